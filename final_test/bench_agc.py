@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+from ptt.agc import AutoGain
+
+# Microbenchmark of the per-route AGC + limiter (ptt.agc) against the block
+# budget: one AutoGain per route, every route fed the same block as in a
+# bridge where each radio talks to all the others. The signal swings from
+# weak to clipping so both the AGC and the limiter do real work.
+
+
+def signal(sample_rate, blocksize, blocks, rng):
+    t = np.arange(blocks * blocksize) / sample_rate
+    level = np.where((t // 2) % 2, 0.8, 0.02)  # 2 s weak, 2 s hot
+    x = np.sin(2 * np.pi * 440 * t) * level + rng.normal(0, 0.005, len(t))
+    return x.astype(np.float32).reshape(blocks, blocksize, 1)
+
+
+def measure(sample_rate, blocksize, routes, blocks):
+    rng = np.random.default_rng(0)
+    agcs = [AutoGain(sample_rate, blocksize) for _ in range(routes)]
+    data = signal(sample_rate, blocksize, blocks, rng)
+    block = np.zeros((blocksize, 1), dtype=np.float32)
+
+    peak = 0.0
+    start = time.perf_counter()
+    for source in data:
+        for agc in agcs:
+            np.copyto(block, source)
+            agc.process(block)
+        peak = max(peak, float(np.abs(block).max()))
+    per_block = (time.perf_counter() - start) / blocks * 1e6
+
+    tracemalloc.start()
+    worst = 0
+    for source in data[:200]:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for agc in agcs:
+            np.copyto(block, source)
+            agc.process(block)
+        _, top = tracemalloc.get_traced_memory()
+        worst = max(worst, top - current)
+    tracemalloc.stop()
+
+    budget = blocksize / sample_rate * 1e6
+    print(
+        f"{sample_rate:>6} Hz / {blocksize:>4}: {routes} routes {per_block:7.1f} µs/block "
+        f"({per_block / budget:5.2%} of {budget:.0f} µs) | peak out {peak:.3f} | "
+        f"worst transient {worst} B | limiter segment {agcs[0].segment} frames"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AGC + limiter CPU per block")
+    parser.add_argument(
+        "--radios", type=int, default=4, help="each talks to all others"
+    )
+    parser.add_argument("--blocks", type=int, default=2000)
+    args = parser.parse_args()
+
+    routes = args.radios * (args.radios - 1)
+    print(f"🔬 {args.radios} radios, {routes} routes, {args.blocks} blocks\n")
+    measure(44100, 1024, routes, args.blocks)
+    measure(8820, 204, routes, args.blocks)  # internal_rate=8820
@@ -0,0 +1,94 @@
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from ptt.recorder import ARCHIVE_FORMATS, OPUS_RATES
+
+# Encode cost and size of every recorder archive format, on the captured
+# traffic in recordings/ and wav/. Audio is written in the recorder's 50 ms
+# chunks, the way the writer thread streams it. Run it on the Pi itself:
+# CPU is reported as a share of real time, size as bytes per hour of
+# keyed traffic.
+
+DEFAULT_INPUTS = [
+    os.path.join(ROOT, "recordings", "recorded_*.wav"),
+    os.path.join(ROOT, "wav", "recorded_*.wav"),
+]
+CHUNK_SECONDS = 0.05
+REPEAT = 20  # the captures only add up to ~25 s of audio
+
+
+def load(paths):
+    clips = []
+    sample_rate = None
+    for path in paths:
+        data, rate = sf.read(path, dtype="float32", always_2d=True)
+        if sample_rate is None:
+            sample_rate = rate
+        if rate != sample_rate:
+            raise ValueError(f"{path} is {rate} Hz, expected {sample_rate} Hz")
+        if len(data):
+            clips.append(data[:, :1])
+    return np.concatenate(clips), sample_rate
+
+
+def encode(audio, sample_rate, name, directory):
+    container, subtype, extension = ARCHIVE_FORMATS[name]
+    path = os.path.join(directory, f"bench.{extension}")
+    chunk = int(CHUNK_SECONDS * sample_rate)
+    start = time.process_time()
+    with sf.SoundFile(
+        path,
+        mode="w",
+        samplerate=sample_rate,
+        channels=1,
+        format=container,
+        subtype=subtype,
+    ) as f:
+        for i in range(0, len(audio), chunk):
+            f.write(audio[i : i + chunk])
+    cpu = time.process_time() - start
+    return cpu, os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare recorder archive formats")
+    parser.add_argument(
+        "inputs", nargs="*", default=DEFAULT_INPUTS, help="WAV files or globs"
+    )
+    args = parser.parse_args()
+
+    paths = sorted(p for pattern in args.inputs for p in glob.glob(pattern))
+    if not paths:
+        raise SystemExit("No input files matched")
+    audio, sample_rate = load(paths)
+    audio = np.tile(audio, (REPEAT, 1))
+    seconds = len(audio) / sample_rate
+
+    print(
+        f"🔬 {seconds:.0f} s of captured traffic @ {sample_rate} Hz, {CHUNK_SECONDS * 1000:.0f} ms writes\n"
+    )
+    print(
+        f"{'format':>7} | {'CPU % of real time':>18} | {'MB per hour':>11} | {'vs wav':>6}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        wav_bytes = None
+        for name in ARCHIVE_FORMATS:
+            if name == "opus" and sample_rate not in OPUS_RATES:
+                print(f"{name:>7} | skipped, Opus cannot encode {sample_rate} Hz")
+                continue
+            cpu, size = encode(audio, sample_rate, name, directory)
+            if wav_bytes is None:
+                wav_bytes = size
+            per_hour = size / seconds * 3600 / 1e6
+            print(
+                f"{name:>7} | {cpu / seconds * 100:17.3f}% | {per_hour:11.1f} | {size / wav_bytes:5.2f}x"
+            )
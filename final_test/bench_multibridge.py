@@ -0,0 +1,114 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from ptt.backend import MockPTT
+from ptt.bridge import Bridge
+from ptt.multibridge import MultiBridge
+
+# Bridge vs MultiBridge on a backend that runs in real time, no sound cards
+# or GPIO needed. MockBackend's virtual clock cannot span the MultiBridge
+# worker processes, so here every stream is a thread paced by the wall
+# clock, inputs carrying 500 Hz tone bursts (3 s on, 3 s off). Each bridge
+# relays A → B; compare B's key-downs, the route's ring over/underruns and
+# the callback stats in the two reports.
+
+
+class RealTimeStream:
+    def __init__(self, kind, sample_rate, blocksize, callback):
+        self.kind = kind
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.latency = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        block = np.zeros((self.blocksize, 1), dtype=np.float32)
+        offsets = np.arange(self.blocksize) / self.sample_rate
+        start = time.monotonic()
+        n = 0
+        while not self._stop.is_set():
+            n += 1
+            delay = start + n * self.blocksize / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if self.kind == "input":
+                t = time.monotonic() + offsets
+                on = (t % 6.0) < 3.0
+                block[:, 0] = np.where(on, 0.3 * np.sin(2 * np.pi * 500 * t), 0)
+            self.callback(block, self.blocksize, None, None)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def close(self):
+        pass
+
+
+class RealTimeBackend:
+    # Defined at module level: spawned workers unpickle it by reference
+    def __init__(self):
+        self.ptts = {}
+
+    def ptt(self, pin):
+        self.ptts[pin] = MockPTT(pin, time.monotonic)
+        return self.ptts[pin]
+
+    def input_stream(self, device, sample_rate, blocksize, callback, channels=1):
+        return RealTimeStream("input", sample_rate, blocksize, callback)
+
+    def output_stream(self, device, sample_rate, blocksize, callback=None, channels=1):
+        return RealTimeStream("output", sample_rate, blocksize, callback)
+
+    def clock(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+def run(cls, seconds, **options):
+    backend = RealTimeBackend()
+    radios = {
+        "A": {"index": 1, "gpio": None},
+        "B": {"index": 2, "gpio": 27},
+    }
+    bridge = cls(radios, {("A", "B"): 1.0}, backend=backend, **options)
+    print(f"\n=== {cls.__name__}, {seconds:.0f} s ===")
+    bridge.start()
+    time.sleep(seconds)
+    bridge.stop()
+    bridge.report()
+    for start, end in backend.ptts[27].keyed_intervals():
+        print(f"B keyed {end - start:.2f} s")
+    if cls is MultiBridge:
+        bridge.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=14.0)
+    parser.add_argument("--sample-rate", type=int, default=8000)
+    parser.add_argument("--blocksize", type=int, default=256)
+    args = parser.parse_args()
+
+    options = {
+        "sample_rate": args.sample_rate,
+        "blocksize": args.blocksize,
+        "telemetry_rate": 0,
+    }
+    run(Bridge, args.seconds, **options)
+    run(MultiBridge, args.seconds, **options)
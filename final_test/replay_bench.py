@@ -0,0 +1,198 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+from ptt.backend import MockBackend
+from ptt.bridge import Bridge
+
+# Offline replay of real captures through the bridge callbacks, no radios,
+# sound cards or GPIO needed. The captures are laid out on a simulated
+# timeline separated by silence, each one counting as an over, and fed block
+# by block into a two-radio bridge (RX → TX). Results are printed as JSON so
+# runs can be diffed between versions.
+
+DEFAULT_INPUTS = [
+    os.path.join(ROOT, "recordings", "recorded_*.wav"),
+    os.path.join(ROOT, "wav", "recorded_*.wav"),
+]
+
+
+def load_timeline(paths, sample_rate, gap):
+    # Concatenate captures with `gap` seconds of silence before and after
+    # each one; returns the audio and the (start, end) of every over
+    silence = np.zeros(int(gap * sample_rate), dtype=np.float32)
+    parts = [silence]
+    overs = []
+    position = len(silence)
+    for path in paths:
+        data, rate = sf.read(path, dtype="float32", always_2d=True)
+        if rate != sample_rate:
+            raise ValueError(f"{path} is {rate} Hz, expected {sample_rate} Hz")
+        if len(data) == 0:
+            continue
+        parts += [data[:, 0], silence]
+        overs.append((position / sample_rate, (position + len(data)) / sample_rate))
+        position += len(data) + len(silence)
+    return np.concatenate(parts), overs
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = np.asarray(values)
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def replay(args):
+    paths = sorted(p for pattern in args.inputs for p in glob.glob(pattern))
+    if not paths:
+        raise SystemExit("No input files matched")
+    sample_rate = sf.info(paths[0]).samplerate
+    blocksize = args.blocksize or round(sample_rate * 1024 / 44100)
+    audio, overs = load_timeline(paths, sample_rate, args.gap)
+    if args.noise > 0:
+        audio += (
+            np.random.default_rng(0)
+            .normal(0, args.noise, len(audio))
+            .astype(np.float32)
+        )
+
+    # The mock backend only provides the PTT lines and the clock here; the
+    # callbacks are called directly so each one can be timed
+    backend = MockBackend()
+    ptt = {"RX": backend.ptt("RX"), "TX": backend.ptt("TX")}
+    radios = {
+        "RX": {
+            "index": 1,
+            "threshold": args.threshold,
+            "vad": args.vad,
+            "noise_floor": None
+            if args.noise_floor is None
+            else {"margin_db": args.noise_floor},
+        },
+        "TX": {"index": 1, "threshold": args.threshold},
+    }
+    bridge = Bridge(
+        radios,
+        {("RX", "TX"): 1.0},
+        sample_rate=sample_rate,
+        blocksize=blocksize,
+        activation_delay=args.activation_delay,
+        silence_timeout=args.silence_timeout,
+        telemetry_rate=0,
+        ptt=ptt,
+        backend=backend,
+    )
+
+    outdata = np.zeros((blocksize, 1), dtype=np.float32)
+    block_period = blocksize / sample_rate
+    cpu = []
+    blocks = len(audio) // blocksize
+    for i in range(blocks):
+        backend.now = (i + 1) * block_period  # timestamp at the end of the block
+        indata = audio[i * blocksize : (i + 1) * blocksize].reshape(-1, 1)
+        start = time.perf_counter()
+        bridge.process_input("RX", indata, backend.now)
+        bridge.process_output("TX", outdata)
+        cpu.append((time.perf_counter() - start) * 1e6)
+
+    # === Score the keyed intervals against the overs
+    intervals = ptt["TX"].keyed_intervals(until=blocks * block_period)
+
+    latencies = []
+    false_keyups = 0
+    for on, off in intervals:
+        hit = [
+            start for start, end in overs if start <= on <= end + bridge.silence_timeout
+        ]
+        if hit:
+            latencies.append((on - hit[0]) * 1000)
+        else:
+            false_keyups += 1
+    missed = sum(
+        1
+        for start, end in overs
+        if not any(on <= end and off >= start for on, off in intervals)
+    )
+
+    cpu_stats = percentiles(cpu)
+    return {
+        "files": len(paths),
+        "sample_rate": sample_rate,
+        "blocksize": blocksize,
+        "blocks": blocks,
+        "vad": args.vad,
+        "threshold": args.threshold,
+        "activation_delay": args.activation_delay,
+        "silence_timeout": args.silence_timeout,
+        "noise": args.noise,
+        "noise_floor_margin_db": args.noise_floor,
+        "final_threshold": bridge.vads["RX"].threshold,
+        "cpu_us": cpu_stats,
+        "cpu_budget_p99_pct": cpu_stats["p99"] / (block_period * 1e6) * 100,
+        "overs": len(overs),
+        "keyups": len(intervals),
+        "false_keyups": false_keyups,
+        "missed_overs": missed,
+        "trigger_to_key_ms": percentiles(latencies),
+        "keyed_seconds": sum(off - on for on, off in intervals),
+        "speech_seconds": sum(end - start for start, end in overs),
+        "ring_underruns": bridge.routes[0].ring.underruns,
+        "ring_overruns": bridge.routes[0].ring.overruns,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay WAV captures through the bridge offline"
+    )
+    parser.add_argument(
+        "inputs", nargs="*", default=DEFAULT_INPUTS, help="WAV files or globs"
+    )
+    parser.add_argument("--vad", choices=["rms", "multi"], default="rms")
+    parser.add_argument("--threshold", type=float, default=0.02)
+    parser.add_argument(
+        "--blocksize",
+        type=int,
+        default=0,
+        help="default: 1024 frames at 44.1 kHz, scaled",
+    )
+    parser.add_argument("--activation-delay", type=float, default=0.5)
+    parser.add_argument("--silence-timeout", type=float, default=1.0)
+    parser.add_argument(
+        "--gap", type=float, default=3.0, help="seconds of silence between captures"
+    )
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=0.0,
+        help="RMS of white noise added to the timeline",
+    )
+    parser.add_argument(
+        "--noise-floor",
+        type=float,
+        metavar="MARGIN_DB",
+        help="track the noise floor, threshold this far above it",
+    )
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    result = json.dumps(replay(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(result + "\n")
+    else:
+        print(result)
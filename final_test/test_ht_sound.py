@@ -1,6 +1,12 @@
 import sounddevice as sd
 import numpy as np
 import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ptt import dsp
+from ptt.telemetry import Telemetry
 
 # === CONFIG ===
 INPUT_DEVICE_INDEX = 2   # Listening device
@@ -9,25 +15,24 @@ OUTPUT_DEVICE_INDEX = 1  # Talking device
 SAMPLE_RATE = 44100
 BLOCKSIZE = 1024
 TARGET_VOLUME = 0.4  # 40% intended output
+TELEMETRY_RATE = 5  # console refreshes per second, 0 for headless
+
+telemetry = Telemetry(["Input"], states=("IDLE", "LIVE"), rate=TELEMETRY_RATE)
 
 def audio_callback(indata, outdata, frames, time_info, status):
     # Calculate RMS of input
-    rms = np.sqrt(np.mean(indata**2))
-
-    # Optional: print RMS value for debug
-    print(f"Input RMS: {rms:.5f}", end="\r")
+    rms = dsp.rms(indata)
 
-    # Normalize if needed
-    if rms > 0:
-        scaled_audio = indata * TARGET_VOLUME
-    else:
-        scaled_audio = indata  # If completely silent, just pass it
+    # Publish RMS for the reporter thread
+    telemetry.publish(0, rms, rms > 0)
 
-    outdata[:] = scaled_audio
+    # Scale straight into the output buffer
+    np.multiply(indata, TARGET_VOLUME, out=outdata)
 
 # === MAIN ===
 try:
     print("? Starting Audio Bridge with RMS Monitoring (scaled to 40%)...\n")
+    telemetry.start()
 
     with sd.Stream(device=(INPUT_DEVICE_INDEX, OUTPUT_DEVICE_INDEX),
                    samplerate=SAMPLE_RATE,
@@ -40,4 +45,5 @@ try:
             time.sleep(0.2)
 
 except KeyboardInterrupt:
+    telemetry.stop()
     print("\n? Exiting cleanly...")
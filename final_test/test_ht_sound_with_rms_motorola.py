@@ -1,6 +1,13 @@
 import sounddevice as sd
 import numpy as np
 import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from ptt import dsp
+from ptt.agc import AutoGain
+from ptt.telemetry import Telemetry
 
 # === CONFIGURATION ===
 INPUT_DEVICE_INDEX = 2   # USB sound card (HT receiver input)
@@ -11,35 +18,34 @@ BLOCKSIZE = 1024
 INPUT_GAIN = 0.5         # << New: Scale input down by 50%
 VOLUME_SCALE = 0.4       # Output volume (40% of input)
 TALK_THRESHOLD = 0.05    # RMS threshold to detect real talking
+AGC = None               # e.g. {"target": 0.1}: AGC + peak limiter after VOLUME_SCALE
+
+TELEMETRY_RATE = 5       # Console refreshes per second, 0 for headless
 
 # === STATE TRACKING ===
-max_rms = 0
+telemetry = Telemetry(["Input"], states=("IDLE/SILENT", "TALKING"), rate=TELEMETRY_RATE)
+scaled_indata = np.zeros((BLOCKSIZE, 1), dtype=np.float32)
+agc = AutoGain(SAMPLE_RATE, BLOCKSIZE, **AGC) if AGC else None
 
 def audio_callback(indata, outdata, frames, time_info, status):
-    global max_rms
-
     # === Step 1: Scale input audio down (reduce RMS) ===
-    scaled_indata = indata * INPUT_GAIN
+    np.multiply(indata, INPUT_GAIN, out=scaled_indata)
 
     # === Step 2: Forward scaled audio to output, with VOLUME_SCALE ===
-    outdata[:] = scaled_indata * VOLUME_SCALE
+    np.multiply(scaled_indata, VOLUME_SCALE, out=outdata)
+    if agc is not None:
+        agc.process(outdata)
 
     # === Step 3: Measure RMS based on scaled input ===
-    rms = np.sqrt(np.mean(scaled_indata**2))
-
-    # Update maximum RMS value
-    if rms > max_rms:
-        max_rms = rms
+    rms = dsp.rms(scaled_indata)
 
-    # === Step 4: Print State ===
-    if rms > TALK_THRESHOLD:
-        print(f"[TALKING] RMS: {rms:.5f} | Max RMS: {max_rms:.5f}     ", end="\r", flush=True)
-    else:
-        print(f"[IDLE/SILENT] RMS: {rms:.5f} | Max RMS: {max_rms:.5f}     ", end="\r", flush=True)
+    # === Step 4: Publish state, the reporter thread tracks Max RMS ===
+    telemetry.publish(0, rms, rms > TALK_THRESHOLD)
 
 # === MAIN PROGRAM ===
 try:
     print("? Starting Audio Bridge with GAIN scaling + RMS monitor...\n")
+    telemetry.start()
 
     # Open input and output audio streams together
     with sd.Stream(device=(INPUT_DEVICE_INDEX, OUTPUT_DEVICE_INDEX),
@@ -53,5 +59,6 @@ try:
             time.sleep(0.1)
 
 except KeyboardInterrupt:
+    telemetry.stop()
     print("\n\n? Exiting cleanly...")
-    print(f"Final Max RMS: {max_rms:.5f}")
+    print(f"Final Max RMS: {telemetry.peaks[0]:.5f}")
@@ -1,11 +1,11 @@
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
-import time
-from gpiozero import LED
-import queue
-import threading
 import os
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+from ptt.bridge import Bridge
+from ptt.noisefloor import load_settings
 
 # === CONFIG ===
 DEVICES = {
@@ -13,171 +13,98 @@ DEVICES = {
         "index": 1,
         "gpio": 17,
         "label": "HT A → HT B",
-        "threshold": 0.02,
+        "threshold": 0.02,  # VOX level; the warm-up level when noise_floor is set
+        "noise_floor": None,  # e.g. {"margin_db": 10} to track the noise floor
+        "vad": "rms",  # "multi" adds ZCR + voice-band checks against noise and static
         "input_gain": 0.8,
-        "volume_scale": 0.5
+        "agc": None,  # e.g. {"target": 0.1}: AGC + limiter on audio routed to this HT
+        # e.g. {"ctcss": 100.0, "commands": {"20": "unlink HT_A HT_B", "21": "link HT_A HT_B"}}
+        # relays only overs with the 100.0 Hz tone, DTMF *20# / *21# unlink and relink
+        "tones": None,
+        "keyup_delay": 0.3,  # time this HT needs to go TX after PTT
+        # TX limits, the scheduler's defaults; e.g. 120 / 0.5 / 0.5 to cut overs
+        # at 2 min, key at most half of every 10 min and wait 0.5 s between overs
+        "tx_timeout": 180.0,  # time-out timer, longest key-down (s), float("inf") for none
+        "duty_cycle": 1.0,  # share of every 10 minutes keyed, 1.0 for no limit
+        "tx_gap": 0.0,  # unkeyed seconds between transmissions
     },
     "HT_B": {
         "index": 2,
         "gpio": 27,
         "label": "HT B → HT A",
-        "threshold": 0.03,
+        "threshold": 0.03,  # VOX level; the warm-up level when noise_floor is set
+        "noise_floor": None,  # e.g. {"margin_db": 10} to track the noise floor
+        "vad": "rms",
         "input_gain": 0.5,
-        "volume_scale": 0.4
+        "agc": None,
+        "tones": None,
+        "keyup_delay": 0.3,  # time this HT needs to go TX after PTT
+        "tx_timeout": 180.0,
+        "duty_cycle": 1.0,
+        "tx_gap": 0.0,
     },
 }
 
+# (source, destination): volume scale of that path
+ROUTES = {
+    ("HT_A", "HT_B"): 0.5,  # HT_A talks → HT_B PTT on
+    ("HT_B", "HT_A"): 0.4,  # HT_B talks → HT_A PTT on
+}
+
 SAMPLE_RATE = 44100
 BLOCKSIZE = 1024
+# VOX/routing/recording rate, None for full rate. Must divide SAMPLE_RATE:
+# 8820 (44100 / 5) here, 8000 or 16000 need SAMPLE_RATE = 48000. Worth it
+# with "multi" VAD, tones or AGC on; with the energy VAD alone the resampling
+# costs more than it saves.
+INTERNAL_RATE = None
 SILENCE_TIMEOUT = 1.0
 ACTIVATION_DELAY = 0.5
 MIN_HOLD_TIME = 1.0
-MAX_RECORD_SECONDS = 30  # maximum duration per recording
+PREROLL_SECONDS = 0.3  # audio kept from before the VOX trigger
+CATCH_UP_LAG = 0.1  # skip pauses while TX is further behind live than this
+RING_BLOCKS = 8  # capacity of each input → output ring
+RING_PREFILL = 2  # blocks buffered before an output starts playing
+TELEMETRY_RATE = 5  # console refreshes per second, 0 for headless
+METRICS_PORT = None  # e.g. 9187 for Prometheus text on http://127.0.0.1:9187/metrics
+METRICS_JSON = None  # e.g. "metrics.json", rewritten every 10 s
+RT_PROFILE = None  # e.g. {"cores": [3], "process_cores": [0, 1, 2], "priority": 70}
+CALIBRATION = None  # e.g. "calibration.json" from python -m ptt.noisefloor calibrate
+MAX_RECORD_SECONDS = 30  # longer overs are split into several files
+RECORD_RING_SECONDS = 5  # audio buffered while the writer waits on the disk
 SAVE_PATH = "recordings"
-
-os.makedirs(SAVE_PATH, exist_ok=True)
-
-ptt_state = {
-    "HT_A": {"active": False, "last_signal": 0, "trigger_time": None, "gpio_on_time": 0, "recording": False, "record_start_time": 0, "record_buffer": []},
-    "HT_B": {"active": False, "last_signal": 0, "trigger_time": None, "gpio_on_time": 0, "recording": False, "record_start_time": 0, "record_buffer": []},
-}
-
-ptt_gpio = {
-    "HT_A": LED(DEVICES["HT_A"]["gpio"]),
-    "HT_B": LED(DEVICES["HT_B"]["gpio"]),
-}
-
-audio_queues = {
-    "HT_A": queue.Queue(maxsize=5),
-    "HT_B": queue.Queue(maxsize=5),
-}
-
-output_streams = {}
-
-# === RECORD SAVING ===
-def save_recording(ht_key):
-    frames = ptt_state[ht_key]["record_buffer"]
-    if frames:
-        timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(ptt_state[ht_key]["record_start_time"]))
-        filename = os.path.join(SAVE_PATH, f"record_{ht_key}_{timestamp}.wav")
-        with sf.SoundFile(filename, mode='w', samplerate=SAMPLE_RATE, channels=1, subtype='PCM_16') as f:
-            for frame in frames:
-                f.write(frame)
-        print(f"\n[REC] Saved {filename}")
-    ptt_state[ht_key]["record_buffer"] = []
-
-# === OUTPUT AUDIO ===
-def start_output_stream(key, device_index):
-    def callback(outdata, frames, time_info, status):
-        try:
-            data = audio_queues[key].get_nowait()
-        except queue.Empty:
-            data = np.zeros((frames, 1), dtype=np.float32)
-        outdata[:] = data
-    stream = sd.OutputStream(
-        device=device_index,
-        channels=1,
-        samplerate=SAMPLE_RATE,
-        blocksize=BLOCKSIZE,
-        dtype='float32',
-        callback=callback
-    )
-    stream.start()
-    return stream
-
-# === VOX HANDLER ===
-def handle_vox(config, gpio, state_key, output_key):
-    def callback(indata, frames, time_info, status):
-        now = time.time()
-        rms = np.sqrt(np.mean(indata**2))
-        print(f"[{config['label']}] RMS: {rms:.5f}", end="\r", flush=True)
-
-        scaled_input = indata * config["input_gain"]
-
-        if rms > config["threshold"]:
-            if ptt_state[state_key]["trigger_time"] is None:
-                ptt_state[state_key]["trigger_time"] = now
-            elif now - ptt_state[state_key]["trigger_time"] >= ACTIVATION_DELAY:
-                ptt_state[state_key]["last_signal"] = now
-                if not ptt_state[state_key]["active"]:
-                    print(f"\n[{config['label']}] 🎤 Signal Confirmed — GPIO {gpio.pin.number} ON", flush=True)
-                    gpio.on()
-                    ptt_state[state_key]["active"] = True
-                    ptt_state[state_key]["gpio_on_time"] = now
-                    ptt_state[state_key]["recording"] = True
-                    ptt_state[state_key]["record_start_time"] = now
-            try:
-                audio_queues[output_key].put_nowait(scaled_input.copy() * config["volume_scale"])
-            except queue.Full:
-                pass
-
-            if ptt_state[state_key]["recording"]:
-                ptt_state[state_key]["record_buffer"].append(indata.copy())
-
-        elif ptt_state[state_key]["active"]:
-            time_since_signal = now - ptt_state[state_key]["last_signal"]
-            time_since_gpio_on = now - ptt_state[state_key]["gpio_on_time"]
-
-            if time_since_signal > SILENCE_TIMEOUT and time_since_gpio_on > MIN_HOLD_TIME:
-                print(f"\n[{config['label']}] 💭 Silence — GPIO {gpio.pin.number} OFF", flush=True)
-                gpio.off()
-                ptt_state[state_key]["active"] = False
-                ptt_state[state_key]["trigger_time"] = None
-                ptt_state[state_key]["gpio_on_time"] = 0
-                if ptt_state[state_key]["recording"]:
-                    ptt_state[state_key]["recording"] = False
-                    save_recording(state_key)
-                # Reset for next transmission
-                ptt_state[state_key]["record_buffer"] = []
-                ptt_state[state_key]["record_start_time"] = 0
-                print(f"[{config['label']}] Ready for next VOX trigger.")
-        else:
-            ptt_state[state_key]["trigger_time"] = None
-            try:
-                audio_queues[output_key].put_nowait(np.zeros((frames, 1), dtype=np.float32))
-            except queue.Full:
-                pass
-
-    stream = sd.InputStream(
-        device=config["index"],
-        channels=1,
-        samplerate=SAMPLE_RATE,
-        blocksize=BLOCKSIZE,
-        dtype='float32',
-        callback=callback
-    )
-    stream.start()
-    return stream
+# Deletes the bridge's own record_* files only, e.g. {"max_bytes": 2_000_000_000,
+# "max_age": 30 * 86400, "min_free_bytes": 500_000_000} for 2 GB, 30 days
+# and 500 MB always free on the SD card
+RETENTION = None
+# Plain WAV, as the script's name says; "flac" (lossless, ~half the size),
+# "adpcm", "opus" or "vorbis" archive compressed (see ptt.recorder), opus
+# needs 8/12/16/24/48 kHz
+RECORD_FORMAT = "wav"
 
 # === MAIN ===
-try:
+if __name__ == "__main__":
     print("\n🎧 Starting VOX PTT Bridge + WAV Recording...\n")
-    streams = []
-
-    output_streams["HT_A"] = start_output_stream("HT_A", DEVICES["HT_A"]["index"])
-    output_streams["HT_B"] = start_output_stream("HT_B", DEVICES["HT_B"]["index"])
-
-    streams.append(handle_vox(
-        DEVICES["HT_A"],
-        ptt_gpio["HT_B"],
-        "HT_A",
-        "HT_B"
-    ))
-    streams.append(handle_vox(
-        DEVICES["HT_B"],
-        ptt_gpio["HT_A"],
-        "HT_B",
-        "HT_A"
-    ))
-
-    while True:
-        time.sleep(0.1)
-
-except KeyboardInterrupt:
-    print("\n🛑 Exiting cleanly...")
-    for gpio in ptt_gpio.values():
-        gpio.off()
-    for stream in streams + list(output_streams.values()):
-        stream.stop()
-        stream.close()
-    print("✅ All GPIOs released. Streams closed.")
+    Bridge(
+        load_settings(CALIBRATION, DEVICES) if CALIBRATION else DEVICES,
+        ROUTES,
+        sample_rate=SAMPLE_RATE,
+        blocksize=BLOCKSIZE,
+        internal_rate=INTERNAL_RATE,
+        silence_timeout=SILENCE_TIMEOUT,
+        activation_delay=ACTIVATION_DELAY,
+        min_hold_time=MIN_HOLD_TIME,
+        preroll=PREROLL_SECONDS,
+        catch_up=CATCH_UP_LAG,
+        ring_blocks=RING_BLOCKS,
+        ring_prefill=RING_PREFILL,
+        telemetry_rate=TELEMETRY_RATE,
+        metrics_port=METRICS_PORT,
+        metrics_json=METRICS_JSON,
+        rt_profile=RT_PROFILE,
+        record_path=SAVE_PATH,
+        max_record_seconds=MAX_RECORD_SECONDS,
+        record_ring_seconds=RECORD_RING_SECONDS,
+        record_format=RECORD_FORMAT,
+        retention=RETENTION,
+    ).run()
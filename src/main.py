@@ -1,5 +1,75 @@
-from ptt import record, play
+import argparse
+
+from ptt import play, record
 
 if __name__ == "__main__":
-    record.start()
-    play.start()
+    parser = argparse.ArgumentParser(description="VOX + PTT transmit system")
+    parser.add_argument(
+        "--mode",
+        choices=["stream", "subprocess", "repeater"],
+        default="subprocess",
+        help="subprocess: sox/aplay per cycle, stream: persistent in-process engine, "
+        "repeater: store-and-forward with capture and transmit overlapped",
+    )
+    parser.add_argument(
+        "--vad",
+        choices=["rms", "multi"],
+        default="rms",
+        help="stream mode voice detector: RMS threshold or multi-feature",
+    )
+    parser.add_argument(
+        "--noise-floor",
+        type=float,
+        metavar="MARGIN_DB",
+        help="stream and repeater modes: track the noise floor and keep the "
+        "VOX threshold this many dB above it",
+    )
+    parser.add_argument(
+        "--io",
+        choices=["stream", "subprocess"],
+        default="stream",
+        help="repeater audio path: in-process streams or sox/aplay per over",
+    )
+    parser.add_argument(
+        "--queue",
+        type=int,
+        default=4,
+        help="repeater overs waiting to transmit (at least 1), the oldest is "
+        "dropped beyond that",
+    )
+    parser.add_argument(
+        "--tx-timeout",
+        type=float,
+        default=180.0,
+        help="longest single key-down (s), in every mode",
+    )
+    parser.add_argument("--device-in", default="plughw:2,0")
+    parser.add_argument("--device-out", default="plughw:2,0")
+    args = parser.parse_args()
+    noise_floor = None if args.noise_floor is None else {"margin_db": args.noise_floor}
+
+    if args.mode == "stream":
+        from ptt import stream
+
+        stream.start(
+            DEVICE_IN=args.device_in,
+            DEVICE_OUT=args.device_out,
+            TX_TIMEOUT=args.tx_timeout,
+            VAD=args.vad,
+            NOISE_FLOOR=noise_floor,
+        )
+    elif args.mode == "repeater":
+        from ptt.repeater import Repeater
+
+        Repeater(
+            device_in=args.device_in,
+            device_out=args.device_out,
+            io=args.io,
+            queue_size=args.queue,
+            vad_kind=args.vad,
+            tx_limits={"timeout": args.tx_timeout},
+            noise_floor=noise_floor,
+        ).run()
+    else:
+        record.start(DEVICE_IN=args.device_in)
+        play.start(DEVICE_OUT=args.device_out, TX_TIMEOUT=args.tx_timeout)
@@ -0,0 +1,141 @@
+# agc.py
+import math
+
+import numpy as np
+
+from ptt import dsp
+
+
+def _divisor_near(n, target):
+    # Divisor of n closest to target, so a block splits into whole segments
+    return min(
+        (d for d in range(1, n + 1) if n % d == 0), key=lambda d: abs(d - target)
+    )
+
+
+class AutoGain:
+    # Automatic gain control with a look-ahead peak limiter, for one route.
+    # The AGC measures each block's RMS and moves its gain towards
+    # target / rms with one-pole smoothing per block, `attack` seconds when
+    # turning down and `release` seconds when turning up, ramping linearly
+    # across the block so gain changes do not click. Blocks below `gate`
+    # hold the gain, so pauses and noise are not pumped up to max_gain.
+    #
+    # The limiter then keeps every sample under `ceiling`. The block is
+    # split into segments of about `lookahead` seconds and delayed by one:
+    # each segment's peak sets the most gain it may get, the gain at every
+    # segment boundary is the lower of its two neighbours' limits, and the
+    # envelope is interpolated between boundaries, so it is already down
+    # when a peak arrives and never above the limit of the segment it
+    # scales. Recovery is capped at 6 dB per `limiter_release` seconds,
+    # which turns into a running minimum in the log domain
+    # (np.minimum.accumulate). Everything is a handful of vector operations
+    # on preallocated float32 buffers, with no per-sample Python and nothing
+    # block-sized allocated per call.
+
+    def __init__(
+        self,
+        sample_rate,
+        blocksize,
+        target=0.1,
+        max_gain=4.0,
+        min_gain=0.25,
+        attack=0.05,
+        release=1.0,
+        gate=0.005,
+        ceiling=0.9,
+        lookahead=0.005,
+        limiter_release=0.05,
+    ):
+        block_seconds = blocksize / sample_rate
+        self.target = target
+        self.max_gain = max_gain
+        self.min_gain = min_gain
+        self.gate = gate
+        self._attack = math.exp(-block_seconds / attack)
+        self._release = math.exp(-block_seconds / release)
+        self.gain = 1.0
+        self.ramp = np.arange(1, blocksize + 1, dtype=np.float32) / blocksize
+        self.envelope = np.zeros(blocksize, dtype=np.float32)
+
+        self.segment = _divisor_near(blocksize, lookahead * sample_rate)
+        segments = blocksize // self.segment
+        self.delay = self.segment / sample_rate  # latency the limiter adds
+        self.buffer = np.zeros(self.segment + blocksize, dtype=np.float32)
+        self._segments = self.buffer.reshape(segments + 1, self.segment)
+        self._magnitude = np.zeros_like(self._segments)
+        self._peaks = np.zeros(segments + 1, dtype=np.float32)
+        # log gain at segment boundaries
+        self._bounds = np.zeros(segments + 1, dtype=np.float32)
+        # curve = [step, start] per segment @ [ramp, 1]: interpolation as
+        # one small matrix product, a broadcast would allocate a buffer
+        self._coeffs = np.zeros((segments, 2), dtype=np.float32)
+        self._basis = np.ones((2, self.segment), dtype=np.float32)
+        self._basis[0] = np.arange(1, self.segment + 1) / self.segment
+        self._rise = (
+            np.arange(segments + 1) * (math.log(2) * self.delay / limiter_release)
+        ).astype(np.float32)
+        self._curve = np.zeros((segments, self.segment), dtype=np.float32)
+        self._log_ceiling = math.log(ceiling)
+        self._last = 0.0  # log gain at the start of the delayed segment
+        self.limited = 0  # blocks the limiter turned down
+
+    def clear(self):
+        # Drops the delayed audio, for a new over; the AGC gain is kept
+        self.buffer.fill(0)
+        self._last = 0.0
+
+    def process(self, block):
+        # block: (frames, 1), frames a multiple of `segment`; in place
+        x = block[:, 0]
+        frames = len(x)
+        seg = self.segment
+        n = frames // seg
+
+        # === AGC: per-block gain, ramped from the previous one ===
+        previous = self.gain
+        level = dsp.rms(x)
+        if level > self.gate:
+            wanted = min(max(self.target / level, self.min_gain), self.max_gain)
+            coef = self._attack if wanted < previous else self._release
+            self.gain = wanted + (previous - wanted) * coef
+        envelope = self.envelope[:frames]
+        np.multiply(self.ramp[:frames], self.gain - previous, out=envelope)
+        envelope += previous
+        np.multiply(x, envelope, out=self.buffer[seg : seg + frames])
+
+        # === Limiter: segment peaks → boundary gains → envelope ===
+        segments = self._segments[: n + 1]
+        magnitude = self._magnitude[: n + 1]
+        peaks = self._peaks[: n + 1]
+        np.abs(segments, out=magnitude)
+        np.max(magnitude, axis=1, out=peaks)
+        np.maximum(peaks, 1e-9, out=peaks)
+        np.log(peaks, out=peaks)
+        np.subtract(self._log_ceiling, peaks, out=peaks)
+        np.minimum(peaks, 0.0, out=peaks)  # log of the most gain per segment
+
+        bounds = self._bounds[: n + 1]
+        bounds[0] = self._last
+        np.minimum(peaks[:-1], peaks[1:], out=bounds[1:])
+        # Recovery cap: bound[k] = min over j <= k of bound[j] + rise * (k - j)
+        rise = self._rise[: n + 1]
+        bounds -= rise
+        np.minimum.accumulate(bounds, out=bounds)
+        bounds += rise
+        self._last = bounds[-1]
+        if bounds.min() < 0:
+            self.limited += 1
+
+        np.exp(bounds, out=bounds)
+        coeffs = self._coeffs[:n]
+        np.subtract(bounds[1:], bounds[:-1], out=coeffs[:, 0])
+        coeffs[:, 1] = bounds[:-1]
+        curve = self._curve[:n]
+        np.matmul(coeffs, self._basis, out=curve)
+        np.multiply(self.buffer[:frames], curve.reshape(-1), out=x)
+        self.buffer[:seg] = self.buffer[frames : frames + seg]
+        return block
+
+    def gain_db(self):
+        return 20 * math.log10(self.gain)
@@ -0,0 +1,321 @@
+# backend.py
+import heapq
+import math
+import os
+import subprocess
+import time
+
+import numpy as np
+
+
+def sd_device(name):
+    # sounddevice matches ALSA devices by substring, e.g. "USB Audio: - (hw:2,0)",
+    # so the "plughw:2,0" names used by sox/aplay are reduced to "hw:2,0".
+    if isinstance(name, str) and name.startswith("plughw:"):
+        return name[len("plug") :]
+    return name
+
+
+def _succeeded(result):
+    # sox/aplay print their own error, say which one failed and how
+    if result.returncode != 0:
+        print(f"⚠️ {result.args[0]} exited with status {result.returncode}")
+    return result.returncode == 0
+
+
+class HardwareBackend:
+    # The Pi: gpiozero for PTT, sounddevice streams, sox/aplay for the
+    # subprocess path. Everything is imported on first use so that modules
+    # taking a backend import fine on hosts without GPIO or PortAudio.
+
+    def ptt(self, pin):
+        from gpiozero import LED
+
+        return LED(pin)
+
+    def input_stream(self, device, samplerate, blocksize, callback, channels=1):
+        import sounddevice as sd
+
+        return sd.InputStream(
+            device=sd_device(device),
+            channels=channels,
+            samplerate=samplerate,
+            blocksize=blocksize,
+            dtype="float32",
+            callback=callback,
+        )
+
+    def output_stream(self, device, samplerate, blocksize, callback=None, channels=1):
+        import sounddevice as sd
+
+        return sd.OutputStream(
+            device=sd_device(device),
+            channels=channels,
+            samplerate=samplerate,
+            blocksize=blocksize,
+            dtype="float32",
+            callback=callback,
+        )
+
+    def record_file(self, device, path, sample_rate, threshold, max_silence):
+        # sox waits for 0.1 s above threshold and stops after max_silence
+        # below; False if it failed (device busy or missing)
+        result = subprocess.run(
+            [
+                "sox",
+                "-t",
+                "alsa",
+                device,
+                "-r",
+                str(sample_rate),
+                "-c",
+                "1",
+                "-e",
+                "signed",
+                "-b",
+                "16",
+                path,
+                "silence",
+                "1",
+                "0.1",
+                threshold,
+                "1",
+                max_silence,
+                threshold,
+            ],
+            check=False,
+        )
+        return _succeeded(result)
+
+    def play_file(self, device, path, sample_rate, max_seconds=None):
+        # aplay -d only takes whole seconds, round down to stay inside the
+        # grant; with less than a second granted nothing is played. An
+        # infinite grant (no time-out) plays the whole file.
+        limit = []
+        if max_seconds is not None and math.isfinite(max_seconds):
+            if max_seconds < 1:
+                print(f"⚠️ Only {max(0, max_seconds):.2f}s granted, aplay skipped")
+                return False
+            limit = ["-d", str(int(max_seconds))]
+        result = subprocess.run(
+            [
+                "aplay",
+                "-D",
+                device,
+                "-r",
+                str(sample_rate),
+                "-f",
+                "S16_LE",
+                "-c",
+                "1",
+                *limit,
+                path,
+            ],
+            check=False,
+        )
+        return _succeeded(result)
+
+    def clock(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class MockPTT:
+    # gpiozero LED stand-in that logs (time, state) for every edge
+    def __init__(self, pin, clock):
+        self.pin = pin
+        self.clock = clock
+        self.value = 0
+        self.edges = []
+
+    def on(self):
+        if not self.value:
+            self.value = 1
+            self.edges.append((self.clock(), True))
+
+    def off(self):
+        if self.value:
+            self.value = 0
+            self.edges.append((self.clock(), False))
+
+    @property
+    def is_lit(self):
+        return bool(self.value)
+
+    def keyed_intervals(self, until=None):
+        # [(on, off)] pairs; an interval still open is closed at `until`
+        intervals = []
+        keyed_at = None
+        for t, state in self.edges:
+            if state:
+                keyed_at = t
+            elif keyed_at is not None:
+                intervals.append((keyed_at, t))
+                keyed_at = None
+        if keyed_at is not None and until is not None:
+            intervals.append((keyed_at, until))
+        return intervals
+
+
+class MockStream:
+    # One virtual sound card stream. Callback streams are driven by
+    # MockBackend.advance(), blocking writes go straight to the capture.
+    def __init__(
+        self, backend, kind, device, samplerate, blocksize, callback, channels
+    ):
+        self.backend = backend
+        self.kind = kind
+        self.device = device
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.channels = channels
+        self.latency = backend.latency
+        self.active = False
+        self.next_time = 0.0
+        self.generation = 0  # invalidates queued blocks across stop/start
+        self._block = np.zeros((blocksize, channels), dtype=np.float32)
+
+    def start(self):
+        self.active = True
+        self.generation += 1
+        self.next_time = self.backend.now + self.blocksize / self.samplerate
+        if self.callback is not None:
+            self.backend._schedule(self)
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+    def write(self, data):
+        data = np.asarray(data, dtype=np.float32).reshape(-1, self.channels)
+        self.backend.outputs.setdefault(self.device, []).append(data.copy())
+        self.backend.sleep(len(data) / self.samplerate)
+
+    def _run_block(self):
+        if self.kind == "input":
+            self.backend._read_input(self.device, self._block)
+            self.callback(self._block, self.blocksize, None, None)
+        else:
+            self._block.fill(0)
+            self.callback(self._block, self.blocksize, None, None)
+            self.backend.outputs.setdefault(self.device, []).append(self._block.copy())
+
+
+class MockBackend:
+    # In-memory hardware on a virtual clock, for deterministic runs without
+    # a Pi. `inputs` maps a device to the PCM (float32, frames x channels)
+    # its input streams and record_file() serve, zeros once exhausted;
+    # everything played to a device is captured in `outputs` and returned
+    # by output(). PTT edges are timestamped with the virtual clock, and
+    # sleep()/advance() move that clock while running every started
+    # callback stream block by block in time order, so a blocking write or
+    # keyup delay lets the input callbacks run just as the real device would.
+
+    def __init__(self, inputs=None, latency=0.0, start_time=0.0):
+        self.inputs = {
+            device: np.asarray(pcm, dtype=np.float32).reshape(len(pcm), -1)
+            for device, pcm in (inputs or {}).items()
+        }
+        self.positions = dict.fromkeys(self.inputs, 0)
+        self.outputs = {}
+        self.ptts = {}
+        self.latency = latency
+        self.now = start_time
+        self._queue = []
+        self._seq = 0
+
+    def ptt(self, pin):
+        self.ptts[pin] = MockPTT(pin, self.clock)
+        return self.ptts[pin]
+
+    def input_stream(self, device, samplerate, blocksize, callback, channels=1):
+        return MockStream(
+            self, "input", device, samplerate, blocksize, callback, channels
+        )
+
+    def output_stream(self, device, samplerate, blocksize, callback=None, channels=1):
+        return MockStream(
+            self, "output", device, samplerate, blocksize, callback, channels
+        )
+
+    def record_file(self, device, path, sample_rate, threshold, max_silence):
+        # Writes whatever is left of the device's input as the recording
+        import soundfile as sf
+
+        pcm = self.inputs.get(device, np.zeros((0, 1), dtype=np.float32))
+        data = pcm[self.positions.get(device, 0) :]
+        self.positions[device] = len(pcm)
+        if len(data):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            sf.write(path, data, sample_rate, subtype="PCM_16")
+        self.sleep(len(data) / sample_rate)
+        return True
+
+    def play_file(self, device, path, sample_rate, max_seconds=None):
+        import soundfile as sf
+
+        data, _ = sf.read(path, dtype="float32", always_2d=True)
+        if max_seconds is not None and math.isfinite(max_seconds):
+            data = data[: max(0, int(max_seconds * sample_rate))]
+        self.outputs.setdefault(device, []).append(data)
+        self.sleep(len(data) / sample_rate)
+        return True
+
+    def output(self, device):
+        blocks = self.outputs.get(device)
+        if not blocks:
+            return np.zeros((0, 1), dtype=np.float32)
+        return np.concatenate(blocks)
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        # Run every callback block that completes by now + seconds
+        end = self.now + seconds
+        while self._queue and self._queue[0][0] <= end:
+            when, _, _, generation, stream = heapq.heappop(self._queue)
+            if not stream.active or generation != stream.generation:
+                continue
+            self.now = when
+            stream._run_block()
+            stream.next_time = when + stream.blocksize / stream.samplerate
+            self._schedule(stream)
+        self.now = end
+
+    def _schedule(self, stream):
+        # Inputs sort before outputs due at the same instant, like a duplex card
+        self._seq += 1
+        heapq.heappush(
+            self._queue,
+            (
+                stream.next_time,
+                stream.kind != "input",
+                self._seq,
+                stream.generation,
+                stream,
+            ),
+        )
+
+    def _read_input(self, device, out):
+        pcm = self.inputs.get(device)
+        out.fill(0)
+        if pcm is None:
+            return
+        pos = self.positions[device]
+        n = min(len(out), len(pcm) - pos)
+        if n > 0:
+            out[:n] = pcm[pos : pos + n, : out.shape[1]]
+            self.positions[device] = pos + n
+
+
+def default():
+    return HardwareBackend()
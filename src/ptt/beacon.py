@@ -0,0 +1,341 @@
+# beacon.py
+import argparse
+import datetime
+import math
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+from ptt import backend as backends
+from ptt.scheduler import PRIORITY_BEACON, TxScheduler
+
+
+def pcm16_layout(path):
+    # (sample_rate, channels, bits, data offset, data bytes) of a PCM WAV,
+    # None for anything else
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk, size = struct.unpack("<4sI", header)
+            if chunk == b"fmt ":
+                tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", f.read(16))
+                fmt = (tag, rate, channels, bits)
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif chunk == b"data":
+                if fmt is None or fmt[0] != 1:
+                    return None
+                return fmt[1], fmt[2], fmt[3], f.tell(), size
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+class Clip:
+    # One announcement, decoded once. With mmap=True a 16-bit mono WAV at
+    # the stream rate is mapped instead and scaled block by block in the
+    # callback, so long clips cost page cache rather than heap. Anything
+    # else is decoded to float32 mono at the stream rate when loaded.
+
+    def __init__(self, path, sample_rate, gain=1.0, mmap=False):
+        self.path = path
+        layout = pcm16_layout(path) if mmap else None
+        if layout is not None and layout[:3] == (sample_rate, 1, 16):
+            _, _, _, offset, size = layout
+            self.pcm = np.memmap(
+                path, dtype="<i2", mode="r", offset=offset, shape=(size // 2,)
+            )
+            self.scale = gain / 32768
+        else:
+            data, rate = sf.read(path, dtype="float32", always_2d=True)
+            data = data.mean(axis=1)
+            if rate != sample_rate:
+                # Load time only; announcements are voice, linear is enough
+                t = np.arange(int(len(data) * sample_rate / rate)) / sample_rate
+                data = np.interp(t, np.arange(len(data)) / rate, data)
+            self.pcm = np.ascontiguousarray(data, dtype=np.float32)
+            self.scale = gain
+        self.mapped = isinstance(self.pcm, np.memmap)
+        self.seconds = len(self.pcm) / sample_rate
+
+    def read(self, position, out):
+        np.multiply(self.pcm[position : position + len(out)], self.scale, out=out)
+
+
+class Every:
+    # Every `minutes`, aligned to the clock (every 15 → :00, :15, :30, :45)
+    def __init__(self, minutes, offset=0.0):
+        self.period = minutes * 60
+        self.offset = offset * 60
+
+    def next_after(self, t):
+        return ((t - self.offset) // self.period + 1) * self.period + self.offset
+
+
+class Cron:
+    # Five-field cron spec "minute hour day-of-month month day-of-week" in
+    # local time, with *, a-b, a,b and /step; days match like cron, either
+    # day field when both are restricted
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, spec):
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec '{spec}' needs 5 fields")
+        self.spec = spec
+        parsed = [self._field(f, lo, hi) for f, (lo, hi) in zip(fields, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}  # 7 is Sunday too
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _field(field, lo, hi):
+        values = set()
+        for part in field.split(","):
+            part, _, step = part.partition("/")
+            if part == "*":
+                start, end = lo, hi
+            elif "-" in part:
+                start, end = (int(v) for v in part.split("-"))
+            else:
+                start = end = int(part)
+                if step:
+                    end = hi
+            if not lo <= start <= end <= hi:
+                raise ValueError(f"Cron field '{field}' outside {lo}-{hi}")
+            values.update(range(start, end + 1, int(step or 1)))
+        return values
+
+    def _day_matches(self, t):
+        day = t.day in self.days
+        weekday = (t.weekday() + 1) % 7 in self.weekdays  # cron counts from Sunday
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, t):
+        # Skips whole days, then hours, then minutes
+        t = datetime.datetime.fromtimestamp(t).replace(second=0, microsecond=0)
+        t += datetime.timedelta(minutes=1)
+        for _ in range(10000):
+            if t.month not in self.months or not self._day_matches(t):
+                t = (t + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + datetime.timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+            else:
+                return t.timestamp()
+        raise ValueError(f"Cron spec '{self.spec}' never matches")
+
+
+class Beacon:
+    # Scheduled announcements from a persistent output stream. Clips are
+    # loaded once (Clip) and the output callback copies the current one
+    # into each block, silence otherwise, so a transmission spawns no
+    # process and reads nothing from disk. Key-ups go through the TX
+    # scheduler at beacon priority, behind live and queued traffic, and a
+    # clip longer than the granted key-down is cut short.
+
+    def __init__(
+        self,
+        device_out="plughw:3,0",
+        ptt_pin=17,
+        sample_rate=8000,
+        blocksize=256,
+        keyup_delay=0.3,
+        scheduler=None,
+        radio=None,
+        tx_limits=None,
+        backend=None,
+    ):
+        self.backend = backend or backends.default()
+        self.device_out = device_out
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.keyup_delay = keyup_delay
+
+        # radio: key of a channel already registered on a shared scheduler
+        self._own_scheduler = scheduler is None
+        self.scheduler = scheduler or TxScheduler(
+            self.backend.clock, self.backend.sleep
+        )
+        self.radio = ptt_pin if radio is None else radio
+        if self.radio not in self.scheduler.channels:
+            self.scheduler.register(
+                self.radio, self.backend.ptt(ptt_pin), **(tx_limits or {})
+            )
+
+        self.clips = {}
+        self.schedules = []  # [name, schedule, next fire time]
+        self.sent = 0
+        self.skipped = 0
+
+        self._clip = None  # set by the transmitter, cleared by the callback
+        self._position = 0
+        self._end = 0
+        self.stream = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, name, path, every=None, cron=None, gain=1.0, mmap=False):
+        # every: minutes; cron: five-field spec; neither for transmit() only
+        self.clips[name] = Clip(path, self.sample_rate, gain=gain, mmap=mmap)
+        for schedule in (
+            Every(every) if every else None,
+            Cron(cron) if cron else None,
+        ):
+            if schedule is not None:
+                self.schedules.append(
+                    [name, schedule, schedule.next_after(time.time())]
+                )
+        return self.clips[name]
+
+    # === PortAudio output thread ===
+    def _callback(self, outdata, frames, time_info, status):
+        clip = self._clip
+        if clip is None:
+            outdata.fill(0)
+            return
+        position = self._position
+        n = max(0, min(frames, self._end - position))
+        clip.read(position, outdata[:n, 0])
+        outdata[n:].fill(0)
+        self._position = position + n
+        if self._position >= self._end:
+            self._clip = None
+
+    # === Transmit ===
+    def _play(self, clip, seconds):
+        self.backend.sleep(self.keyup_delay)  # Wait for radio to go TX
+        # The loop below notices the end up to a block late
+        block = self.blocksize / self.sample_rate
+        room = seconds - self.keyup_delay - self.stream.latency - block
+        self._end = len(clip.pcm)
+        if math.isfinite(room):  # infinite without a time-out
+            self._end = min(self._end, max(0, int(room * self.sample_rate)))
+        self._position = 0
+        self._clip = clip
+        while self._clip is not None and not self._stop.is_set():
+            self.backend.sleep(block)
+        self._clip = None
+        # The last block is queued, let the device drain
+        self.backend.sleep(self.stream.latency)
+
+    def transmit(self, name, wait=None):
+        # Blocking; False if the channel did not come free within `wait`
+        clip = self.clips[name]
+        sent = self.scheduler.transmit(
+            self.radio, lambda seconds: self._play(clip, seconds), PRIORITY_BEACON, wait
+        )
+        if sent:
+            self.sent += 1
+        else:
+            self.skipped += 1
+        return sent
+
+    # === Schedule thread ===
+    def _run(self):
+        while self.schedules:
+            entry = min(self.schedules, key=lambda e: e[2])
+            if self._stop.wait(max(0.0, entry[2] - time.time())):
+                return
+            name, schedule, due = entry
+            # A beacon still waiting at its next slot is skipped, not stacked
+            period = schedule.next_after(due) - due
+            print(f"📢 Beacon '{name}'")
+            self.transmit(name, wait=period)
+            entry[2] = schedule.next_after(time.time())
+
+    def open(self):
+        if self.stream is None:
+            self.stream = self.backend.output_stream(
+                self.device_out, self.sample_rate, self.blocksize, self._callback
+            )
+            self.stream.start()
+            self.scheduler.start()
+        return self
+
+    def start(self):
+        self.open()
+        self._stop.clear()
+        if self._thread is None and self.schedules:
+            self._thread = threading.Thread(
+                target=self._run, name="beacon", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._own_scheduler:
+            self.scheduler.stop()
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def run(self):
+        for name, schedule, due in self.schedules:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(due))
+            print(f"🔁 '{name}' ({self.clips[name].seconds:.1f}s) next at {stamp}")
+        try:
+            self.start()
+            while True:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("\n🛑 Exiting cleanly...")
+        finally:
+            self.stop()
+            print(f"✅ {self.sent} beacons sent, {self.skipped} skipped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scheduled beacon transmitter")
+    parser.add_argument("clip", help="WAV (or any libsndfile format) to transmit")
+    parser.add_argument("--every", type=float, help="minutes between beacons")
+    parser.add_argument("--cron", help='five-field spec, e.g. "0 8-20 * * *"')
+    parser.add_argument("--now", action="store_true", help="transmit once and exit")
+    parser.add_argument("--device-out", default="plughw:3,0")
+    parser.add_argument("--ptt-pin", type=int, default=17)
+    parser.add_argument("--sample-rate", type=int, default=8000)
+    parser.add_argument("--keyup-delay", type=float, default=0.3)
+    parser.add_argument("--gain", type=float, default=1.0)
+    parser.add_argument("--mmap", action="store_true", help="map 16-bit WAVs")
+    args = parser.parse_args()
+
+    beacon = Beacon(
+        device_out=args.device_out,
+        ptt_pin=args.ptt_pin,
+        sample_rate=args.sample_rate,
+        keyup_delay=args.keyup_delay,
+    )
+    name = os.path.basename(args.clip)
+    beacon.add(
+        name,
+        args.clip,
+        every=args.every,
+        cron=args.cron,
+        gain=args.gain,
+        mmap=args.mmap,
+    )
+    if args.now or not beacon.schedules:
+        beacon.open()
+        beacon.transmit(name)
+        beacon.stop()
+    else:
+        beacon.run()
@@ -0,0 +1,856 @@
+# bridge.py
+import os
+import threading
+import time
+
+import numpy as np
+
+from ptt import backend as backends
+from ptt import dsp, vad
+from ptt.agc import AutoGain
+from ptt.catalog import Catalog
+from ptt.drift import DriftCompensator
+from ptt.metrics import Metrics
+from ptt.noisefloor import NoiseFloor, db
+from ptt.preroll import PreRoll
+from ptt.recorder import StreamRecorder
+from ptt.resample import Decimator, Interpolator
+from ptt.retention import RetentionManager
+from ptt.ring import RingBuffer
+from ptt.rtprofile import RuntimeProfile
+from ptt.scheduler import TxScheduler
+from ptt.telemetry import Telemetry
+from ptt.tones import ToneDecoder
+
+RADIO_DEFAULTS = {
+    "threshold": 0.02,
+    "input_gain": 1.0,
+    "keyup_delay": 0.3,  # time this radio needs to go TX after PTT
+    "tx_timeout": 180.0,  # longest single key-down, seconds
+    "duty_cycle": 1.0,  # share of duty_window this radio may transmit
+    "duty_window": 600.0,
+    "tx_gap": 0.0,  # unkeyed seconds between transmissions
+    "vad": "rms",  # "rms" (threshold only) or "multi" (see ptt.vad)
+    "vad_options": {},
+    "noise_floor": None,  # ptt.noisefloor options, tracks the threshold
+    "agc": None,  # ptt.agc options for audio routed to this radio
+    "tones": None,  # ptt.tones options: CTCSS gate, DTMF "commands"
+}
+
+
+def check_routes(radios, routes):
+    for src, dst in routes:
+        if src not in radios or dst not in radios:
+            raise KeyError(f"Route {src} → {dst} names an unknown radio")
+        if src == dst:
+            raise ValueError(f"Route {src} → {dst} would loop a radio into itself")
+
+
+class Route:
+    # One source → destination path. The source's input callback is the only
+    # producer of `ring` and the destination's output callback the only
+    # consumer, so every route is a lock-free SPSC hand-off.
+
+    def __init__(
+        self, src, dst, gain, blocksize, ring_frames, prefill, resample, agc=None
+    ):
+        self.src = src
+        self.dst = dst
+        # 0-d so the per-block multiply does not convert a Python float
+        self.gain = np.array(gain, dtype=np.float32)
+        self.agc = agc  # AutoGain after the gain, None for a fixed level
+        self.index = 0  # position in Bridge.routes and Bridge.links
+        self.linked = True  # as of the source's current over
+        self.ring = RingBuffer(ring_frames, prefill=prefill)
+        # Across two sound cards the consumer follows the producer's clock
+        self.reader = DriftCompensator(self.ring, blocksize) if resample else self.ring
+        self.scratch = np.zeros((blocksize, 1), dtype=np.float32)  # producer side
+        self.mix = np.zeros((blocksize, 1), dtype=np.float32)  # consumer side
+        self._mixes = {}
+
+    def mix_view(self, frames):
+        # mix[:frames]; a slice is a new view object per call, so each
+        # block size's is built once
+        view = self._mixes.get(frames)
+        if view is None:
+            view = self._mixes[frames] = self.mix[:frames]
+        return view
+
+
+class Bridge:
+    # VOX bridge for N radios. `radios` maps a key to its config (device
+    # index, gpio, threshold, input_gain, keyup_delay, label) and `routes`
+    # maps (source, destination) to the gain of that path, followed by an
+    # AGC and peak limiter (ptt.agc) when the destination sets `agc`. A
+    # destination fed by several active sources plays their mix and stays
+    # keyed until the last one drops. A radio with `tones` set only relays
+    # signal carrying its CTCSS tone and takes DTMF commands that link and
+    # unlink routes (ptt.tones). Work per block is one VOX per input plus
+    # one copy per route, so CPU grows linearly with the number of radios
+    # and routes.
+    # PTT lines and sound cards come from `backend` (ptt.backend), the Pi's
+    # hardware by default, and every key-up goes through `scheduler`
+    # (ptt.scheduler) which applies each radio's time-out, duty cycle and
+    # gap; a destination it refuses is retried block by block while the
+    # over lasts, one it cuts off stays unkeyed until the over ends.
+
+    def __init__(
+        self,
+        radios,
+        routes,
+        sample_rate=44100,
+        blocksize=1024,
+        internal_rate=None,
+        silence_timeout=1.0,
+        activation_delay=0.5,
+        min_hold_time=1.0,
+        preroll=0.3,
+        catch_up=0.1,
+        ring_blocks=8,
+        ring_prefill=2,
+        telemetry_rate=5,
+        drift_compensation=True,
+        record_path=None,
+        max_record_seconds=30,
+        record_ring_seconds=5,
+        record_format="wav",
+        record_catalog=True,
+        retention=None,
+        metrics_port=None,
+        metrics_json=None,
+        metrics_interval=10.0,
+        rt_profile=None,
+        local=None,
+        ptt=None,
+        scheduler=None,
+        clock=None,
+        backend=None,
+    ):
+        self.radios = {
+            key: {**RADIO_DEFAULTS, "label": key, **cfg} for key, cfg in radios.items()
+        }
+        # The sound cards run at sample_rate with blocks of blocksize frames.
+        # With internal_rate set, VOX, pre-roll, routing and recording run
+        # at that rate instead, and each device block is decimated on input
+        # and interpolated on output (see ptt.resample). The resamplers only
+        # take integer factors, so from 44.1 kHz the narrowband choice is
+        # 8820 Hz (/5, still above the 3.4 kHz voice band); 8 and 16 kHz
+        # need the cards opened at 48 kHz. The resampling is a fixed few
+        # numpy calls per block each way, which only pays off when the
+        # per-block work it shrinks (multi-feature VAD, tone decoding, AGC)
+        # outweighs it; final_test/bench_callback_alloc.py compares both.
+        self.sample_rate = sample_rate
+        self.rate = internal_rate or sample_rate
+        if sample_rate % self.rate:
+            raise ValueError(
+                f"internal_rate {self.rate} must divide sample_rate {sample_rate}"
+            )
+        self.factor = sample_rate // self.rate
+        blocksize //= self.factor
+        self.blocksize = blocksize  # frames per block at the internal rate
+        self.device_blocksize = blocksize * self.factor
+        self.silence_timeout = silence_timeout
+        self.activation_delay = activation_delay
+        self.min_hold_time = min_hold_time
+        # local: the radios whose streams this Bridge runs, every one of
+        # them unless it is a MultiBridge worker; per-radio DSP state is
+        # only built for these
+        self.local = [key for key in self.radios if local is None or key in local]
+        self.backend = backend or backends.default()
+        self.clock = clock or self.backend.clock
+        self.ptt = None
+        self.scheduler = scheduler or TxScheduler(self.clock, self.backend.sleep)
+
+        check_routes(self.radios, routes)
+        self.routes = [
+            Route(
+                src,
+                dst,
+                gain,
+                blocksize,
+                blocksize * ring_blocks,
+                blocksize * ring_prefill,
+                drift_compensation
+                and self.radios[src].get("index") != self.radios[dst].get("index"),
+                AutoGain(self.rate, blocksize, **self.radios[dst]["agc"])
+                if self.radios[dst]["agc"] is not None
+                else None,
+            )
+            for (src, dst), gain in routes.items()
+        ]
+        for index, route in enumerate(self.routes):
+            route.index = index
+        # DTMF link/unlink commands set these, a route picks its value up
+        # when its source's next over starts
+        self.links = np.ones(len(self.routes))
+        self.outgoing = {
+            key: [r for r in self.routes if r.src == key] for key in self.radios
+        }
+        self.incoming = {
+            key: [r for r in self.routes if r.dst == key] for key in self.radios
+        }
+
+        # === Per-source VOX state ===
+        self.state = {
+            key: {
+                "active": False,
+                "last_signal": 0,
+                "trigger_time": None,
+                "active_since": 0,
+                "ready_at": None,  # set once a destination is keyed
+            }
+            for key in self.radios
+        }
+        self.prerolls = {}
+        for key in self.local:
+            keyup = max(
+                (self.radios[r.dst]["keyup_delay"] for r in self.outgoing[key]),
+                default=0,
+            )
+            self.prerolls[key] = PreRoll(
+                preroll + activation_delay + keyup + silence_timeout,
+                self.rate,
+                blocksize,
+                lookback=preroll,
+                catch_up=catch_up,
+            )
+        # 0-d, as Route.gain
+        self.input_gains = {
+            key: np.array(self.radios[key]["input_gain"], dtype=np.float32)
+            for key in self.local
+        }
+        self.vads = {
+            key: vad.create(
+                cfg["vad"],
+                self.rate,
+                blocksize,
+                cfg["threshold"],
+                **cfg["vad_options"],
+            )
+            for key, cfg in self.radios.items()
+            if key in self.local
+        }
+        # With noise_floor set, `threshold` only applies until the tracker
+        # has warmed up, then follows the floor
+        self.noise_floors = {
+            key: NoiseFloor(blocksize / self.rate, **cfg["noise_floor"])
+            for key, cfg in self.radios.items()
+            if cfg["noise_floor"] is not None
+            and self.outgoing[key]
+            and key in self.local
+        }
+        self.decoders = {}
+        self.commands = {}
+        for key, cfg in self.radios.items():
+            if cfg["tones"] is None or not self.outgoing[key] or key not in self.local:
+                continue
+            options = dict(cfg["tones"])
+            commands = options.pop("commands", {})
+            options.setdefault("dtmf", bool(commands))
+            self.decoders[key] = ToneDecoder(self.rate, blocksize, **options)
+            # digits → (linked, route, message), the message built here so
+            # the input callback only appends it
+            self.commands[key] = {}
+            for digits, action in commands.items():
+                linked, route = self._parse_command(action)
+                change = "🔗 linked" if linked else "✂️ unlinked"
+                message = (
+                    f"[{cfg['label']}] ☎️ DTMF {digits}#: {change} "
+                    f"{route.src} → {route.dst}"
+                )
+                self.commands[key][digits] = linked, route, message
+        self.tone_rejected = {key: 0 for key in self.radios}  # blocks
+        self.replay = {
+            key: np.zeros((blocksize, 1), dtype=np.float32) for key in self.local
+        }
+        self.silence = np.zeros((blocksize, 1), dtype=np.float32)
+        self.decimators = {}
+        self.interpolators = {}
+        if self.factor > 1:
+            for key in self.local:
+                if self.outgoing[key]:
+                    self.decimators[key] = Decimator(self.factor, self.device_blocksize)
+                if self.incoming[key]:
+                    self.interpolators[key] = Interpolator(self.factor, blocksize)
+
+        # === Per-destination PTT state ===
+        self.keyers = {key: 0 for key in self.radios}
+        self.keyed = {key: False for key in self.radios}
+        self.keyed_at = {key: 0 for key in self.radios}
+        self.key_counts = {key: 0 for key in self.radios}
+        self.keyed_seconds = {key: 0.0 for key in self.radios}
+        self._key_lock = threading.Lock()  # taken on key/unkey edges only
+
+        self.telemetry = Telemetry(
+            [cfg["label"] for cfg in self.radios.values()],
+            states=("RX", "VOX"),
+            rate=telemetry_rate,
+        )
+        self.slots = {key: i for i, key in enumerate(self.radios)}
+        self.messages = {
+            key: {
+                "vox": f"[{cfg['label']}] 🎤 Signal Confirmed",
+                "silence": f"[{cfg['label']}] 💤 Silence",
+                "on": f"[{cfg['label']}] 📡 GPIO {cfg.get('gpio')} ON",
+                "off": f"[{cfg['label']}] ⚪ GPIO {cfg.get('gpio')} OFF",
+                "cut": f"[{cfg['label']}] ⏱️ TX limit, GPIO {cfg.get('gpio')} OFF",
+                "dtmf": f"[{cfg['label']}] ☎️ DTMF entry unknown",
+            }
+            for key, cfg in self.radios.items()
+        }
+
+        self.recorders = {}
+        self.catalog = None
+        if record_path is not None:
+            if record_catalog:
+                self.catalog = Catalog(os.path.join(record_path, "catalog.db"))
+            self.recorders = {
+                key: StreamRecorder(
+                    key,
+                    save_path=record_path,
+                    sample_rate=self.rate,
+                    max_seconds=max_record_seconds,
+                    ring_seconds=record_ring_seconds,
+                    archive=record_format,
+                    catalog=self.catalog,
+                    on_saved=self._saved,
+                )
+                for key in self.local
+                if self.outgoing[key]
+            }
+
+        # retention: limits for RetentionManager (max_bytes, max_age,
+        # min_free_bytes, ...) applied to record_path
+        self.retention = None
+        if record_path is not None and retention:
+            self.retention = RetentionManager(
+                [record_path],
+                catalog=self.catalog,
+                on_warning=self.telemetry.event,
+                **retention,
+            )
+
+        self.metrics = Metrics(
+            port=metrics_port, json_path=metrics_json, interval=metrics_interval
+        )
+        self._register_metrics()
+
+        # rt_profile: options for RuntimeProfile (cores, priority,
+        # lock_memory, gc, ...), None to leave the runtime alone
+        self.rt_profile = RuntimeProfile(**rt_profile) if rt_profile else None
+
+        self.streams = []
+        if ptt is not None:
+            self._register_ptt(ptt)
+
+    def _register_ptt(self, ptt):
+        self.ptt = ptt
+        for key, gpio in ptt.items():
+            cfg = self.radios[key]
+            self.scheduler.register(
+                key,
+                gpio,
+                timeout=cfg["tx_timeout"],
+                duty_cycle=cfg["duty_cycle"],
+                window=cfg["duty_window"],
+                gap=cfg["tx_gap"],
+            )
+
+    def _register_metrics(self):
+        routes = {(("src", r.src), ("dst", r.dst)): r for r in self.routes}
+        radios = {(("radio", key),): key for key in self.radios}
+        m = self.metrics
+        m.gauge(
+            "ptt_ring_fill_frames",
+            "Frames buffered per route",
+            lambda: {k: r.ring.fill() for k, r in routes.items()},
+        )
+        m.counter(
+            "ptt_ring_overrun_frames_total",
+            "Frames dropped because a route ring was full",
+            lambda: {k: r.ring.overruns for k, r in routes.items()},
+        )
+        m.counter(
+            "ptt_ring_underrun_frames_total",
+            "Frames zero-filled because a route ring was empty",
+            lambda: {k: r.ring.underruns for k, r in routes.items()},
+        )
+        m.gauge(
+            "ptt_drift_ppm",
+            "Clock offset tracked by the drift compensator",
+            lambda: {
+                k: r.reader.ppm()
+                for k, r in routes.items()
+                if isinstance(r.reader, DriftCompensator)
+            },
+        )
+        m.gauge(
+            "ptt_keyed",
+            "1 while the radio's PTT is on",
+            lambda: {k: int(self.keyed[key]) for k, key in radios.items()},
+        )
+        m.counter(
+            "ptt_key_total",
+            "PTT key-ups",
+            lambda: {k: self.key_counts[key] for k, key in radios.items()},
+        )
+        m.counter(
+            "ptt_keyed_seconds_total",
+            "Seconds spent transmitting, including the current key-up",
+            lambda: {k: self._keyed_seconds(key) for k, key in radios.items()},
+        )
+        m.counter(
+            "ptt_recorder_dropped_frames_total",
+            "Frames the recorder ring dropped while the disk stalled",
+            lambda: {
+                (("radio", key),): rec.ring.overruns
+                for key, rec in self.recorders.items()
+            },
+        )
+        m.gauge(
+            "ptt_duty_ratio",
+            "Share of the duty cycle window spent transmitting",
+            lambda: {
+                (("radio", key),): s["duty"]
+                for key, s in self.scheduler.stats().items()
+            },
+        )
+        m.counter(
+            "ptt_tx_cut_total",
+            "Transmissions cut off by the time-out timer or the duty budget",
+            lambda: {
+                (("radio", key), ("limit", limit)): s[field]
+                for key, s in self.scheduler.stats().items()
+                for limit, field in (("timeout", "timeouts"), ("duty", "duty_cuts"))
+            },
+        )
+        m.counter(
+            "ptt_tx_denied_total",
+            "Key-up requests the scheduler refused, by reason",
+            lambda: {
+                (("radio", key), ("reason", reason)): n
+                for key, s in self.scheduler.stats().items()
+                for reason, n in s["denied"].items()
+            },
+        )
+        agcs = {k: r.agc for k, r in routes.items() if r.agc is not None}
+        m.gauge(
+            "ptt_agc_gain_db",
+            "Gain the route's AGC currently applies",
+            lambda: {k: agc.gain_db() for k, agc in agcs.items()},
+        )
+        m.counter(
+            "ptt_limiter_blocks_total",
+            "Blocks the route's peak limiter turned down",
+            lambda: {k: agc.limited for k, agc in agcs.items()},
+        )
+        m.gauge(
+            "ptt_route_linked",
+            "1 while the route is linked, DTMF commands change it",
+            lambda: {k: int(self.links[r.index]) for k, r in routes.items()},
+        )
+        m.gauge(
+            "ptt_ctcss_hz",
+            "CTCSS tone heard on the radio's input, 0 for none",
+            lambda: {
+                (("radio", key),): decoder.tone or 0
+                for key, decoder in self.decoders.items()
+                if decoder.ctcss is not None
+            },
+        )
+        m.counter(
+            "ptt_tone_rejected_blocks_total",
+            "Signal blocks not relayed for a missing access tone or DTMF",
+            lambda: {
+                (("radio", key),): self.tone_rejected[key] for key in self.decoders
+            },
+        )
+        m.counter(
+            "ptt_dtmf_entries_total",
+            "DTMF entries completed with #",
+            lambda: {
+                (("radio", key),): decoder.commands
+                for key, decoder in self.decoders.items()
+            },
+        )
+        m.gauge(
+            "ptt_vox_threshold_rms",
+            "RMS level that counts as signal",
+            lambda: {
+                (("radio", key),): vad.threshold
+                for key, vad in self.vads.items()
+                if self.outgoing[key]
+            },
+        )
+        m.gauge(
+            "ptt_noise_floor_rms",
+            "Tracked noise floor of the receiver",
+            lambda: {
+                (("radio", key),): tracker.floor
+                for key, tracker in self.noise_floors.items()
+                if tracker.floor is not None
+            },
+        )
+        if self.retention is not None:
+            m.counter(
+                "ptt_retention_reclaimed_bytes_total",
+                "Bytes deleted by retention",
+                lambda: {(): self.retention.reclaimed_bytes},
+            )
+
+    def _parse_command(self, action):
+        # "link SRC DST" / "unlink SRC DST" → (linked, route)
+        verb, src, dst = action.split()
+        if verb not in ("link", "unlink"):
+            raise ValueError(f"Unknown command '{action}', expected link or unlink")
+        for route in self.routes:
+            if (route.src, route.dst) == (src, dst):
+                return verb == "link", route
+        raise KeyError(f"Command '{action}' names no route")
+
+    def _command(self, key, entry):
+        # Input callback, when a DTMF entry is completed with "#"
+        command = self.commands[key].get(entry)
+        if command is None:
+            self.telemetry.event(self.messages[key]["dtmf"])
+            return
+        linked, route, message = command
+        self.links[route.index] = 1 if linked else 0
+        self.telemetry.event(message)
+
+    def _keyed_seconds(self, key):
+        seconds = self.keyed_seconds[key]
+        if self.keyed[key]:
+            seconds += self.clock() - self.keyed_at[key]
+        return seconds
+
+    def _saved(self, filename):
+        # Recorder writer threads, after each file closes
+        self.telemetry.event(f"[REC] Saved {filename}")
+        if self.retention is not None:
+            self.retention.add(filename)
+
+    # === PTT edges ===
+    def _key_destinations(self, src):
+        with self._key_lock:
+            for route in self.outgoing[src]:
+                if route.linked:
+                    self.keyers[route.dst] += 1
+
+    def _hold_destinations(self, src, now):
+        # Every block of an over: key the destinations the scheduler allows,
+        # drop the ones it cut off. Returns when every keyed destination is
+        # in TX, None while none is.
+        ready_at = None
+        for route in self.outgoing[src]:
+            if not route.linked:
+                continue
+            dst = route.dst
+            if not self.keyed[dst]:
+                with self._key_lock:
+                    if self.keyers[dst] and self.scheduler.acquire(dst, now):
+                        self.keyed[dst] = True
+                        self.keyed_at[dst] = now
+                        self.key_counts[dst] += 1
+                        self.telemetry.event(self.messages[dst]["on"])
+            elif not self.scheduler.check(dst, now):
+                with self._key_lock:
+                    if self.keyed[dst]:
+                        self.keyed[dst] = False
+                        self.keyed_seconds[dst] += now - self.keyed_at[dst]
+                        self.telemetry.event(self.messages[dst]["cut"])
+            if self.keyed[dst]:
+                ready = self.keyed_at[dst] + self.radios[dst]["keyup_delay"]
+                ready_at = ready if ready_at is None else max(ready_at, ready)
+        return ready_at
+
+    def _unkey_destinations(self, src, now):
+        with self._key_lock:
+            for route in self.outgoing[src]:
+                if not route.linked:
+                    continue
+                dst = route.dst
+                self.keyers[dst] -= 1
+                if self.keyers[dst] == 0:
+                    # Also lifts a time-out lockout
+                    self.scheduler.release(dst, now)
+                    if self.keyed[dst]:
+                        self.keyed[dst] = False
+                        self.keyed_seconds[dst] += now - self.keyed_at[dst]
+                        self.telemetry.event(self.messages[dst]["off"])
+
+    # === Audio callbacks, hardware independent ===
+    def process_input(self, key, indata, now):
+        state = self.state[key]
+        preroll = self.prerolls[key]
+        if self.factor > 1:
+            indata = self.decimators[key].process(indata)
+
+        # === Step 1: Measure true RMS (before gain) and classify the block,
+        # keep scaled audio and the decision for replay
+        rms = dsp.rms(indata)
+        tracker = self.noise_floors.get(key)
+        if tracker is not None and not self.keyed[key] and tracker.update(rms):
+            # Blocks received while keyed are the muted receiver, not noise
+            self.vads[key].threshold = tracker.threshold
+        voiced = self.vads[key].update(indata, rms)
+        decoder = self.decoders.get(key)
+        if decoder is not None:
+            entry = decoder.update(indata)
+            if entry is not None:
+                self._command(key, entry)
+            # Signal without the access tone, or DTMF, is not relayed
+            if voiced and not decoder.passing:
+                voiced = False
+                self.tone_rejected[key] += 1
+        preroll.write(indata, voiced, gain=self.input_gains[key])
+
+        # A keyed radio is transmitting and its receiver is muted, so its
+        # input cannot start an over (and a monitor leak cannot loop back)
+        voiced = voiced and not self.keyed[key]
+
+        # === Step 2: VOX with activation delay and hold time
+        if voiced:
+            if state["trigger_time"] is None:
+                state["trigger_time"] = now
+                preroll.mark()
+            elif now - state["trigger_time"] >= self.activation_delay:
+                state["last_signal"] = now
+                if not state["active"]:
+                    state["active"] = True
+                    state["active_since"] = now
+                    self.telemetry.event(self.messages[key]["vox"])
+                    state["ready_at"] = None
+                    for route in self.outgoing[key]:
+                        route.linked = bool(self.links[route.index])
+                        if route.agc is not None:
+                            route.agc.clear()
+                    self._key_destinations(key)
+                    if key in self.recorders:
+                        self.recorders[key].begin(time.time())
+            if key in self.recorders:
+                self.recorders[key].write(indata)
+
+        elif state["active"]:
+            time_since_signal = now - state["last_signal"]
+            time_since_active = now - state["active_since"]
+
+            if (
+                time_since_signal > self.silence_timeout
+                and time_since_active > self.min_hold_time
+            ):
+                state["active"] = False
+                state["trigger_time"] = None
+                self.telemetry.event(self.messages[key]["silence"])
+                self._unkey_destinations(key, now)
+                if key in self.recorders:
+                    self.recorders[key].end()
+        else:
+            state["trigger_time"] = None
+
+        # === Step 3: Once every keyed destination is in TX, replay from
+        # before the trigger
+        if state["active"]:
+            ready_at = self._hold_destinations(key, now)
+            if state["ready_at"] is None:
+                state["ready_at"] = ready_at
+        if (
+            state["active"]
+            and state["ready_at"] is not None
+            and now >= state["ready_at"]
+        ):
+            replay = self.replay[key]
+            preroll.read(replay, skip_below=0.5)
+            for route in self.outgoing[key]:
+                if not route.linked:
+                    route.ring.write(self.silence)
+                    continue
+                np.multiply(replay, route.gain, out=route.scratch)
+                if route.agc is not None:
+                    route.agc.process(route.scratch)
+                route.ring.write(route.scratch)
+        else:
+            for route in self.outgoing[key]:
+                route.ring.write(self.silence)
+
+        self.telemetry.publish(self.slots[key], rms, state["active"])
+
+    def process_output(self, key, outdata):
+        if self.factor > 1:
+            interpolator = self.interpolators[key]
+            self._render(key, interpolator.input(len(outdata) // self.factor))
+            interpolator.process(outdata)
+        else:
+            self._render(key, outdata)
+
+    def _render(self, key, outdata):
+        routes = self.incoming[key]
+        if len(routes) == 1:
+            routes[0].reader.read(outdata)
+            return
+        # Mix every source routed here
+        outdata.fill(0)
+        frames = len(outdata)
+        for route in routes:
+            mix = route.mix_view(frames)
+            route.reader.read(mix)
+            np.add(outdata, mix, out=outdata)
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+
+    # === Hardware ===
+    def _input_callback(self, key):
+        stream = self.metrics.stream(f"{key}_in", "input")
+        clock = self.clock
+        entered = self.rt_profile is None
+
+        def callback(indata, frames, time_info, status):
+            nonlocal entered
+            if not entered:
+                entered = True
+                self.rt_profile.enter_thread(stream.name)
+            start = time.perf_counter()
+            self.process_input(key, indata, clock())
+            stream.record(status, time.perf_counter() - start, start)
+
+        return callback
+
+    def _output_callback(self, key):
+        stream = self.metrics.stream(f"{key}_out", "output")
+        entered = self.rt_profile is None
+
+        def callback(outdata, frames, time_info, status):
+            nonlocal entered
+            if not entered:
+                entered = True
+                self.rt_profile.enter_thread(stream.name)
+            start = time.perf_counter()
+            self.process_output(key, outdata)
+            stream.record(status, time.perf_counter() - start, start)
+
+        return callback
+
+    def start(self):
+        if self.rt_profile is not None:
+            # First, so threads started from here on inherit its affinity
+            self.rt_profile.apply(idle=lambda: not any(self.keyed.values()))
+        if self.ptt is None:
+            self._register_ptt(
+                {
+                    key: self.backend.ptt(cfg["gpio"])
+                    for key, cfg in self.radios.items()
+                    if self.incoming[key]
+                }
+            )
+        self.scheduler.start()
+
+        self.telemetry.start()
+        for recorder in self.recorders.values():
+            recorder.start()
+        if self.retention is not None:
+            self.retention.start()
+        self.metrics.start()
+
+        for key, cfg in self.radios.items():
+            if self.incoming[key]:
+                self.streams.append(
+                    self.backend.output_stream(
+                        cfg["index"],
+                        self.sample_rate,
+                        self.device_blocksize,
+                        self._output_callback(key),
+                    )
+                )
+        for key, cfg in self.radios.items():
+            if self.outgoing[key]:
+                self.streams.append(
+                    self.backend.input_stream(
+                        cfg["index"],
+                        self.sample_rate,
+                        self.device_blocksize,
+                        self._input_callback(key),
+                    )
+                )
+        for stream in self.streams:
+            stream.start()
+        return self
+
+    def stop(self):
+        self.scheduler.stop()
+        for gpio in (self.ptt or {}).values():
+            gpio.off()
+        for stream in self.streams:
+            stream.stop()
+            stream.close()
+        self.streams = []
+        self.metrics.stop()
+        for recorder in self.recorders.values():
+            recorder.stop()
+        if self.retention is not None:
+            self.retention.stop()
+        if self.catalog is not None:
+            self.catalog.close()
+        self.telemetry.stop()
+        if self.rt_profile is not None:
+            self.rt_profile.stop()
+
+    def report(self):
+        for route in self.routes:
+            print(
+                f"[{route.src} → {route.dst}] Ring overruns: {route.ring.overruns} frames, "
+                f"underruns: {route.ring.underruns} frames"
+            )
+            if isinstance(route.reader, DriftCompensator):
+                print(
+                    f"[{route.src} → {route.dst}] Clock offset: {route.reader.ppm():+.0f} ppm, "
+                    f"fill {route.reader.level:.0f}/{route.reader.target} frames"
+                )
+            if route.agc is not None:
+                print(
+                    f"[{route.src} → {route.dst}] AGC gain {route.agc.gain_db():+.1f} dB, "
+                    f"limited {route.agc.limited} blocks"
+                )
+        for s in self.metrics.streams:
+            print(
+                f"[{s.name}] {s.callback_seconds.count} callbacks, "
+                f"max {s.max_seconds * 1000:.2f} ms, "
+                f"max interval {s.max_interval * 1000:.1f} ms, "
+                f"xruns {s.status['input_overflow'] + s.status['output_underflow']}"
+            )
+        for route in self.routes:
+            if not self.links[route.index]:
+                print(f"[{route.src} → {route.dst}] ✂️ Unlinked")
+        for key, decoder in self.decoders.items():
+            print(
+                f"[{key}] Tones: CTCSS {decoder.tone or 'none'}, "
+                f"{self.tone_rejected[key]} blocks rejected, "
+                f"{decoder.commands} DTMF entries"
+            )
+        for key, tracker in self.noise_floors.items():
+            if tracker.floor is not None:
+                print(
+                    f"[{key}] Noise floor {db(tracker.floor):.1f} dBFS, "
+                    f"VOX threshold {self.vads[key].threshold:.4f} "
+                    f"({db(self.vads[key].threshold):.1f} dBFS)"
+                )
+        self.scheduler.report()
+        for key, recorder in self.recorders.items():
+            print(f"[{key}] Recorder dropped: {recorder.ring.overruns} frames")
+        if self.retention is not None:
+            print(
+                f"[REC] Retention reclaimed {self.retention.reclaimed_bytes / 1e6:.1f} MB "
+                f"in {self.retention.deleted_files} files, "
+                f"{self.retention.total_bytes / 1e6:.1f} MB kept "
+                f"+ {self.retention.catalog_bytes / 1e6:.1f} MB catalog"
+            )
+
+    def run(self):
+        try:
+            self.start()
+            while True:
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("\n🛑 Exiting cleanly...")
+        finally:
+            self.stop()
+            self.report()
+            print("✅ All GPIOs released. Streams closed.")
@@ -0,0 +1,299 @@
+# catalog.py
+import argparse
+import concurrent.futures
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".opus", ".ogg")
+LEVEL_WINDOW = 0.1  # seconds per RMS window for peak_rms
+RECORDER_PREFIX = "record_"  # StreamRecorder's files, all retention deletes
+
+# record_{key}_{YYYYmmdd_HHMMSS}.ext from StreamRecorder,
+# recorded_{YYYYmmdd_HHMMSS}.wav from the sox scripts
+FILENAME = re.compile(r"^(?:recorded|record_(?P<key>.+))_(?P<stamp>\d{8}_\d{6})\.\w+$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS overs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    source TEXT,              -- radio key, NULL when the filename has none
+    start REAL NOT NULL,      -- unix time of the first frame in the file
+    end REAL NOT NULL,
+    duration REAL NOT NULL,   -- seconds
+    peak_rms REAL NOT NULL,   -- loudest LEVEL_WINDOW
+    mean_rms REAL NOT NULL,   -- over the whole file
+    offset REAL NOT NULL,     -- seconds into the over, > 0 for split files
+    size INTEGER NOT NULL,    -- bytes on disk
+    sample_rate INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS overs_start ON overs (start);
+CREATE INDEX IF NOT EXISTS overs_source_start ON overs (source, start);
+CREATE INDEX IF NOT EXISTS overs_duration ON overs (duration);
+"""
+
+
+class Levels:
+    # Running peak (over fixed windows) and mean RMS of a stream of blocks,
+    # so the recorder and the rebuild measure a file the same way
+    def __init__(self, window):
+        self.window = max(1, int(window))
+        self.frames = 0
+        self.energy = 0.0
+        self.peak = 0.0
+        self._partial = 0.0
+        self._partial_frames = 0
+
+    def update(self, block):
+        x = np.asarray(block, dtype=np.float64).reshape(len(block), -1)[:, 0]
+        self.frames += len(x)
+        squares = x * x
+        self.energy += float(squares.sum())
+
+        # Top up the window left open by the previous block
+        head = min(len(x), self.window - self._partial_frames)
+        self._partial += float(squares[:head].sum())
+        self._partial_frames += head
+        if self._partial_frames < self.window:
+            return
+        self._close_window()
+
+        rest = squares[head:]
+        whole = len(rest) // self.window * self.window
+        if whole:
+            sums = rest[:whole].reshape(-1, self.window).sum(axis=1)
+            self.peak = max(self.peak, float(np.sqrt(sums.max() / self.window)))
+        self._partial = float(rest[whole:].sum())
+        self._partial_frames = len(rest) - whole
+
+    def _close_window(self):
+        if self._partial_frames:
+            rms = (self._partial / self._partial_frames) ** 0.5
+            self.peak = max(self.peak, rms)
+        self._partial = 0.0
+        self._partial_frames = 0
+
+    def finish(self):
+        self._close_window()
+        mean = (self.energy / self.frames) ** 0.5 if self.frames else 0.0
+        return self.peak, mean
+
+
+class Catalog:
+    # SQLite index of the recordings, one row per file. StreamRecorder adds
+    # a row as each file closes (writer threads share the connection behind
+    # a lock); rebuild() indexes existing directories with a process pool.
+    # WAL with synchronous=NORMAL keeps each insert to one append on flash.
+
+    def __init__(self, path="recordings/catalog.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def add(
+        self,
+        path,
+        source,
+        start,
+        duration,
+        peak_rms,
+        mean_rms,
+        offset,
+        size,
+        sample_rate,
+    ):
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO overs (path, source, start, end, duration, "
+                "peak_rms, mean_rms, offset, size, sample_rate) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.abspath(path),
+                    source,
+                    start,
+                    start + duration,
+                    duration,
+                    peak_rms,
+                    mean_rms,
+                    offset,
+                    size,
+                    sample_rate,
+                ),
+            )
+
+    def remove(self, path):
+        with self._lock, self.db:
+            self.db.execute(
+                "DELETE FROM overs WHERE path = ?", (os.path.abspath(path),)
+            )
+
+    def query(self, since=None, until=None, source=None, min_duration=None, limit=None):
+        # Files overlapping [since, until], newest first
+        clauses = []
+        params = []
+        if since is not None:
+            # Bound start too so the range is served by the start indexes;
+            # no file starts earlier than since - longest duration
+            clauses.append(
+                "start >= ? - (SELECT IFNULL(MAX(duration), 0) FROM overs) AND end >= ?"
+            )
+            params += [since, since]
+        if until is not None:
+            clauses.append("start <= ?")
+            params.append(until)
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+        if min_duration is not None:
+            clauses.append("duration >= ?")
+            params.append(min_duration)
+        sql = "SELECT * FROM overs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY start DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self.db.execute(sql, params)]
+
+    def rebuild(self, directories, workers=None, full=False):
+        # Index new or changed files, drop rows whose file is gone. Rows
+        # whose size still matches are kept as is (they may carry the
+        # recorder's split offset), unless full is set.
+        paths = sorted(
+            os.path.abspath(path)
+            for directory in directories
+            for path in glob.glob(os.path.join(directory, "*"))
+            if path.lower().endswith(AUDIO_EXTENSIONS)
+        )
+        roots = tuple(os.path.join(os.path.abspath(d), "") for d in directories)
+        with self._lock:
+            known = {
+                row["path"]: row["size"]
+                for row in self.db.execute("SELECT path, size FROM overs")
+                if row["path"].startswith(roots)
+            }
+        present = set(paths)
+        if not full:
+            paths = [p for p in paths if known.get(p) != os.path.getsize(p)]
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = [row for row in pool.map(scan, paths, chunksize=8) if row]
+        with self._lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO overs (path, source, start, end, duration, "
+                "peak_rms, mean_rms, offset, size, sample_rate) "
+                "VALUES (:path, :source, :start, :end, :duration, "
+                ":peak_rms, :mean_rms, :offset, :size, :sample_rate)",
+                rows,
+            )
+            self.db.executemany(
+                "DELETE FROM overs WHERE path = ?",
+                [(path,) for path in known if path not in present],
+            )
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+def scan(path):
+    # Metadata for one existing file; None if it holds no audio. Runs in the
+    # rebuild's worker processes.
+    import soundfile as sf
+
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        return None
+    if info.frames == 0:
+        return None
+
+    match = FILENAME.match(os.path.basename(path))
+    if match:
+        source = match.group("key")
+        start = time.mktime(time.strptime(match.group("stamp"), "%Y%m%d_%H%M%S"))
+    else:
+        # e.g. last_recording.wav: written once the over ended
+        source = None
+        start = os.path.getmtime(path) - info.duration
+
+    levels = Levels(LEVEL_WINDOW * info.samplerate)
+    for block in sf.blocks(path, blocksize=65536, dtype="float32", always_2d=True):
+        levels.update(block)
+    peak_rms, mean_rms = levels.finish()
+    return {
+        "path": os.path.abspath(path),
+        "source": source,
+        "start": start,
+        "end": start + info.duration,
+        "duration": info.duration,
+        "peak_rms": peak_rms,
+        "mean_rms": mean_rms,
+        "offset": 0.0,
+        "size": os.path.getsize(path),
+        "sample_rate": info.samplerate,
+    }
+
+
+def parse_time(value):
+    # "YYYY-mm-dd HH:MM[:SS]" in local time, or unix seconds
+    for layout in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, layout))
+        except ValueError:
+            pass
+    return float(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recording catalog")
+    parser.add_argument("--db", default="recordings/catalog.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="index existing directories")
+    rebuild.add_argument("directories", nargs="+")
+    rebuild.add_argument("--workers", type=int, default=None)
+    rebuild.add_argument("--full", action="store_true", help="rescan every file")
+    search = commands.add_parser("query", help="list overs, newest first")
+    search.add_argument("--since", type=parse_time)
+    search.add_argument("--until", type=parse_time)
+    search.add_argument("--source")
+    search.add_argument("--min-duration", type=float)
+    search.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    catalog = Catalog(args.db)
+    if args.command == "rebuild":
+        start = time.perf_counter()
+        added = catalog.rebuild(args.directories, workers=args.workers, full=args.full)
+        print(f"✅ Indexed {added} files in {time.perf_counter() - start:.2f}s")
+    else:
+        start = time.perf_counter()
+        rows = catalog.query(
+            since=args.since,
+            until=args.until,
+            source=args.source,
+            min_duration=args.min_duration,
+            limit=args.limit,
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        for row in rows:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["start"]))
+            print(
+                f"{stamp}  {row['source'] or '-':>6}  {row['duration']:6.1f}s  "
+                f"peak {row['peak_rms']:.3f}  mean {row['mean_rms']:.3f}  {row['path']}"
+            )
+        print(f"🔎 {len(rows)} overs in {elapsed:.1f} ms")
+    catalog.close()
@@ -0,0 +1,132 @@
+# drift.py
+import math
+
+import numpy as np
+
+
+class DriftCompensator:
+    # Adaptive resampler on the consumer side of a RingBuffer whose producer
+    # runs on another sound card's crystal. The smoothed fill level is held at
+    # `target` frames by a PI controller that nudges the resampling ratio
+    # (frames consumed per frame played); the ratio settles on the relative
+    # clock error of the two cards, so latency stays fixed instead of the
+    # ring slowly filling up (drops) or draining (clicks).
+
+    def __init__(
+        self,
+        ring,
+        blocksize,
+        target=None,
+        max_ppm=2000,
+        kp=5e-4,
+        ki=1e-7,
+        smoothing=0.01,
+    ):
+        self.ring = ring
+        self.blocksize = blocksize
+        self.target = ring.prefill + blocksize if target is None else target
+        self.max_ratio = max_ppm * 1e-6
+        self.kp = kp
+        self.ki = ki
+        self.smoothing = smoothing
+
+        self.level = float(self.target)
+        self.integral = 0.0
+        self.ratio = 1.0
+        self.phase = 0.0
+        # The two as 0-d arrays for the ufuncs, which would otherwise convert
+        # a Python float to a new array on every call
+        self._ratio = np.ones(())
+        self._phase = np.zeros(())
+
+        # x[0] carries the last frame of the previous read for interpolation
+        self.x = np.zeros(
+            (math.ceil(blocksize * (1 + self.max_ratio)) + 2, ring.buffer.shape[1]),
+            dtype=ring.buffer.dtype,
+        )
+        self._k = np.arange(blocksize, dtype=np.float64)
+        self._pos = np.zeros(blocksize, dtype=np.float64)
+        self._floor = np.zeros(blocksize, dtype=np.float64)
+        self._frac = np.zeros((blocksize, 1), dtype=np.float32)
+        self._idx = np.zeros(blocksize, dtype=np.intp)
+        self._a = np.zeros((blocksize, ring.buffer.shape[1]), dtype=ring.buffer.dtype)
+        self._b = np.zeros((blocksize, ring.buffer.shape[1]), dtype=ring.buffer.dtype)
+        # Slices are new view objects, so the ones a block size (or a
+        # consumed frame count) needs are built on first use and reused
+        self._views = {}
+        self._inputs = {}
+        self._carry = self.x[0]
+        self._next = self.x[1:]  # x[idx + 1] is _next[idx]
+
+    def ppm(self):
+        return (self.ratio - 1.0) * 1e6
+
+    def _slices(self, frames):
+        views = self._views.get(frames)
+        if views is None:
+            views = self._views[frames] = (
+                self._k[:frames],
+                self._pos[:frames],
+                self._floor[:frames],
+                self._idx[:frames],
+                self._frac[:frames, 0],
+                self._frac[:frames],
+                self._a[:frames],
+                self._b[:frames],
+            )
+        return views
+
+    def _input(self, consumed):
+        # x[1 : consumed + 1], where the new frames of a read go, and its
+        # last frame, carried over to x[0]
+        views = self._inputs.get(consumed)
+        if views is None:
+            views = self._inputs[consumed] = (
+                self.x[1 : consumed + 1],
+                self.x[consumed],
+            )
+        return views
+
+    def _update_ratio(self):
+        self.level += self.smoothing * (self.ring.fill() - self.level)
+        error = (self.level - self.target) / self.blocksize
+        self.integral = min(
+            max(self.integral + self.ki * error, -self.max_ratio), self.max_ratio
+        )
+        correction = min(
+            max(self.kp * error + self.integral, -self.max_ratio), self.max_ratio
+        )
+        self.ratio = 1.0 + correction
+
+    def read(self, out):
+        frames = len(out)
+        if frames > self.blocksize:
+            return self.ring.read(out)
+        self._update_ratio()
+
+        # Output frame k sits at input position phase + k * ratio, where
+        # position 0 is the carried-over frame and 1..m are new frames
+        consumed = math.floor(self.phase + frames * self.ratio)
+        new, last = self._input(consumed)
+        n = self.ring.read(new)
+
+        k, pos, floor, idx, column, frac, a, b = self._slices(frames)
+        self._ratio.fill(self.ratio)
+        self._phase.fill(self.phase)
+        np.multiply(k, self._ratio, out=pos)
+        np.add(pos, self._phase, out=pos)
+        np.floor(pos, out=floor)
+        np.copyto(idx, floor, casting="unsafe")
+        np.subtract(pos, floor, out=pos)
+        np.copyto(column, pos, casting="unsafe")
+        # mode="clip" skips the bounds-check copy that mode="raise" makes;
+        # the method, unlike np.take, has no Python wrapper that allocates
+        self.x.take(idx, axis=0, out=a, mode="clip")
+        self._next.take(idx, axis=0, out=b, mode="clip")
+        np.subtract(b, a, out=b)
+        np.multiply(b, frac, out=b)
+        np.add(a, b, out=out)
+
+        self.phase = self.phase + frames * self.ratio - consumed
+        np.copyto(self._carry, last)
+        return min(n, frames)
@@ -0,0 +1,12 @@
+# dsp.py
+import math
+
+import numpy as np
+
+
+def rms(block):
+    # Dot product of the block with itself, no squared temporary is allocated
+    flat = block.reshape(-1)
+    if flat.size == 0:
+        return 0.0
+    return math.sqrt(float(np.dot(flat, flat)) / flat.size)
@@ -0,0 +1,322 @@
+# latency.py
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from ptt.backend import HardwareBackend, MockBackend
+from ptt.bridge import Bridge
+
+# End-to-end latency of one bridge route, measured by injecting chirps on
+# the source radio's input and finding them again in the destination's
+# output by cross-correlation. Each trial is split into stages:
+#   detect  chirp start → PTT edge on the destination (VOX + activation delay)
+#   keyup   PTT edge → replay starts (the destination's keyup_delay)
+#   playout replay start → chirp heard at the output (pre-roll, rings, device)
+# With the mock backend everything runs on the virtual clock and is exact.
+# On hardware a test sound card plays the chirps into the source radio's
+# input jack and records the destination's output over loopback cables.
+
+
+class EdgeLog:
+    # Wraps a PTT line and timestamps its edges with the bridge clock
+    def __init__(self, ptt, clock):
+        self.ptt = ptt
+        self.clock = clock
+        self.ons = []
+
+    def on(self):
+        self.ons.append(self.clock())
+        self.ptt.on()
+
+    def off(self):
+        self.ptt.off()
+
+
+def chirp(sample_rate, seconds, f0=300.0, f1=3000.0, level=0.5):
+    # Linear sweep across the voice band, with 10 ms fades
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    phase = 2 * np.pi * (f0 * t + (f1 - f0) / (2 * seconds) * t * t)
+    x = level * np.sin(phase)
+    fade = min(len(x) // 2, int(0.01 * sample_rate))
+    ramp = np.linspace(0, 1, fade)
+    x[:fade] *= ramp
+    x[len(x) - fade :] *= ramp[::-1]
+    return x.astype(np.float32)
+
+
+def stimulus(template, sample_rate, trials, gap):
+    # Silence, chirp, silence, ...; returns the signal and chirp offsets (s)
+    silence = np.zeros(int(gap * sample_rate), dtype=np.float32)
+    period = len(silence) + len(template)
+    signal = np.concatenate([np.concatenate([silence, template])] * trials + [silence])
+    return signal, [(i * period + len(silence)) / sample_rate for i in range(trials)]
+
+
+def find(captured, template, start, window):
+    # Offset (frames) of the best match of template in captured[start:start+window]
+    # and its normalized correlation, via FFT cross-correlation
+    segment = captured[start : start + window + len(template)]
+    if len(segment) < len(template):
+        return None, 0.0
+    n = 1 << math.ceil(math.log2(len(segment) + len(template)))
+    corr = np.fft.irfft(np.fft.rfft(segment, n) * np.conj(np.fft.rfft(template, n)), n)
+    corr = corr[: len(segment) - len(template) + 1]
+    peak = int(np.argmax(corr))
+    energy = np.sqrt(
+        np.dot(template, template)
+        * np.dot(
+            segment[peak : peak + len(template)], segment[peak : peak + len(template)]
+        )
+    )
+    return start + peak, float(corr[peak] / energy) if energy > 0 else 0.0
+
+
+def stats(values):
+    if not values:
+        return None
+    values = np.asarray(values) * 1000
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "max_ms": float(values.max()),
+    }
+
+
+def analyse(
+    bridge, src, dst, template, offsets, captured, capture_start, log, max_latency
+):
+    rate = bridge.sample_rate
+    keyup_delay = bridge.radios[dst]["keyup_delay"]
+    stages = {"total": [], "detect": [], "keyup": [], "playout": []}
+    missed = 0
+    for offset in offsets:
+        sent = capture_start + offset
+        frame, quality = find(
+            captured, template, int(offset * rate), int(max_latency * rate)
+        )
+        heard = None if frame is None else capture_start + frame / rate
+        keyed = [t for t in log.ons if sent <= t <= sent + max_latency]
+        if heard is None or quality < 0.5 or not keyed:
+            missed += 1
+            continue
+        ready = keyed[0] + keyup_delay
+        stages["total"].append(heard - sent)
+        stages["detect"].append(keyed[0] - sent)
+        stages["keyup"].append(ready - keyed[0])
+        stages["playout"].append(heard - ready)
+    return {
+        "route": f"{src} → {dst}",
+        "trials": len(offsets),
+        "missed": missed,
+        **{stage: stats(values) for stage, values in stages.items()},
+    }
+
+
+def measure_mock(
+    bridge, backend, src, dst, trials=20, gap=3.0, chirp_seconds=None, max_latency=3.0
+):
+    # bridge must be built on `backend` (a MockBackend) and not started
+    rate = bridge.sample_rate
+    seconds = chirp_seconds or bridge.activation_delay + 0.5
+    template = chirp(rate, seconds)
+    signal, offsets = stimulus(template, rate, trials, gap)
+    backend.inputs[bridge.radios[src]["index"]] = signal.reshape(-1, 1)
+    backend.positions[bridge.radios[src]["index"]] = 0
+
+    bridge.start()
+    log = EdgeLog(bridge.ptt[dst], bridge.clock)
+    bridge.ptt[dst] = bridge.scheduler.channels[dst].ptt = log
+    capture_start = backend.now  # input frame 0 and output frame 0 start here
+    backend.advance(len(signal) / rate)
+    bridge.stop()
+    captured = backend.output(bridge.radios[dst]["index"])[:, 0]
+    return analyse(
+        bridge, src, dst, template, offsets, captured, capture_start, log, max_latency
+    )
+
+
+def measure_hardware(
+    bridge,
+    src,
+    dst,
+    inject,
+    capture,
+    trials=20,
+    gap=3.0,
+    chirp_seconds=None,
+    max_latency=3.0,
+    rig_latency=0.0,
+):
+    # `inject` plays into the source radio's input jack, `capture` records
+    # the destination's output; both on one test card so they share a clock.
+    # rig_latency is the test card's own out→in delay (see --calibrate).
+    rate = bridge.sample_rate
+    block = bridge.device_blocksize
+    seconds = chirp_seconds or bridge.activation_delay + 0.5
+    template = chirp(rate, seconds)
+    signal, offsets = stimulus(template, rate, trials, gap)
+    captured = np.zeros(len(signal) + int(max_latency * rate), dtype=np.float32)
+    position = {"out": 0, "in": 0, "start": None}
+
+    def play(outdata, frames, time_info, status):
+        if position["start"] is None:
+            position["start"] = bridge.clock()
+        chunk = signal[position["out"] : position["out"] + frames]
+        outdata.fill(0)
+        outdata[: len(chunk), 0] = chunk
+        position["out"] += frames
+
+    def record(indata, frames, time_info, status):
+        n = min(frames, len(captured) - position["in"])
+        captured[position["in"] : position["in"] + n] = indata[:n, 0]
+        position["in"] += n
+
+    backend = bridge.backend
+    bridge.start()
+    log = EdgeLog(bridge.ptt[dst], bridge.clock)
+    bridge.ptt[dst] = bridge.scheduler.channels[dst].ptt = log
+    rig = [
+        backend.input_stream(capture, rate, block, record),
+        backend.output_stream(inject, rate, block, play),
+    ]
+    for stream in rig:
+        stream.start()
+    try:
+        while position["in"] < len(captured):
+            time.sleep(0.1)
+    finally:
+        for stream in rig:
+            stream.stop()
+            stream.close()
+        bridge.stop()
+
+    if rig_latency:
+        captured = captured[int(rig_latency * rate) :]
+    return analyse(
+        bridge,
+        src,
+        dst,
+        template,
+        offsets,
+        captured,
+        position["start"],
+        log,
+        max_latency,
+    )
+
+
+def calibrate(inject, capture, sample_rate=44100, blocksize=1024, trials=5):
+    # Test card alone, its output cabled straight to its input
+    backend = HardwareBackend()
+    template = chirp(sample_rate, 0.5)
+    signal, offsets = stimulus(template, sample_rate, trials, 1.0)
+    captured = np.zeros(len(signal) + sample_rate, dtype=np.float32)
+    position = {"out": 0, "in": 0}
+
+    def play(outdata, frames, time_info, status):
+        chunk = signal[position["out"] : position["out"] + frames]
+        outdata.fill(0)
+        outdata[: len(chunk), 0] = chunk
+        position["out"] += frames
+
+    def record(indata, frames, time_info, status):
+        n = min(frames, len(captured) - position["in"])
+        captured[position["in"] : position["in"] + n] = indata[:n, 0]
+        position["in"] += n
+
+    rig = [
+        backend.input_stream(capture, sample_rate, blocksize, record),
+        backend.output_stream(inject, sample_rate, blocksize, play),
+    ]
+    for stream in rig:
+        stream.start()
+    while position["in"] < len(captured):
+        time.sleep(0.1)
+    for stream in rig:
+        stream.stop()
+        stream.close()
+    delays = [
+        find(captured, template, int(o * sample_rate), sample_rate)[0] / sample_rate - o
+        for o in offsets
+    ]
+    return float(np.median(delays))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bridge end-to-end latency")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--gap", type=float, default=3.0, help="silence between chirps")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--blocksize", type=int, default=1024)
+    parser.add_argument("--internal-rate", type=int, default=None)
+    parser.add_argument("--activation-delay", type=float, default=0.5)
+    parser.add_argument("--keyup-delay", type=float, default=0.3)
+    parser.add_argument("--preroll", type=float, default=0.3)
+    parser.add_argument("--ring-blocks", type=int, default=8)
+    parser.add_argument("--ring-prefill", type=int, default=2)
+    parser.add_argument(
+        "--hardware", action="store_true", help="real radios and a test card"
+    )
+    parser.add_argument("--src-index", type=int, default=1)
+    parser.add_argument("--dst-index", type=int, default=2)
+    parser.add_argument("--dst-gpio", type=int, default=27)
+    parser.add_argument(
+        "--inject", help="test card output wired to the source radio's input"
+    )
+    parser.add_argument(
+        "--capture", help="test card input wired to the destination's output"
+    )
+    parser.add_argument("--rig-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--calibrate", action="store_true", help="measure the test card alone"
+    )
+    args = parser.parse_args()
+
+    if args.calibrate:
+        print(
+            json.dumps(
+                {"rig_latency": calibrate(args.inject, args.capture, args.sample_rate)}
+            )
+        )
+        raise SystemExit
+
+    backend = HardwareBackend() if args.hardware else MockBackend()
+    radios = {
+        "SRC": {"index": args.src_index, "gpio": None},
+        "DST": {
+            "index": args.dst_index,
+            "gpio": args.dst_gpio,
+            "keyup_delay": args.keyup_delay,
+        },
+    }
+    bridge = Bridge(
+        radios,
+        {("SRC", "DST"): 1.0},
+        sample_rate=args.sample_rate,
+        blocksize=args.blocksize,
+        internal_rate=args.internal_rate,
+        activation_delay=args.activation_delay,
+        preroll=args.preroll,
+        ring_blocks=args.ring_blocks,
+        ring_prefill=args.ring_prefill,
+        telemetry_rate=0,
+        backend=backend,
+    )
+    options = {"trials": args.trials, "gap": args.gap}
+    if args.hardware:
+        result = measure_hardware(
+            bridge,
+            "SRC",
+            "DST",
+            args.inject,
+            args.capture,
+            rig_latency=args.rig_latency,
+            **options,
+        )
+    else:
+        result = measure_mock(bridge, backend, "SRC", "DST", **options)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,247 @@
+# metrics.py
+import bisect
+import http.server
+import json
+import os
+import threading
+import time
+
+# Callback durations, seconds. A 1024-frame block at 44.1 kHz is 23 ms.
+CALLBACK_BUCKETS = (
+    50e-6,
+    100e-6,
+    200e-6,
+    500e-6,
+    1e-3,
+    2e-3,
+    5e-3,
+    10e-3,
+    20e-3,
+    50e-3,
+)
+STATUS_FLAGS = (
+    "input_overflow",
+    "input_underflow",
+    "output_overflow",
+    "output_underflow",
+    "priming_output",
+)
+
+
+class Histogram:
+    # Fixed buckets, one plain list increment per observation. Only the
+    # owning callback thread writes; readers may see a sample mid-update,
+    # which a scrape tolerates.
+    def __init__(self, buckets=CALLBACK_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class StreamMetrics:
+    # Everything an audio callback records about its own stream
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind  # "input" or "output"
+        self.callback_seconds = Histogram()
+        self.status = dict.fromkeys(STATUS_FLAGS, 0)
+        # Worst cases: time spent in one callback, and between the starts
+        # of two (scheduling delay shows up here before it underruns)
+        self.max_seconds = 0.0
+        self.max_interval = 0.0
+        self._last_start = None
+
+    def record(self, status, seconds, start=None):
+        self.callback_seconds.observe(seconds)
+        self.max_seconds = max(self.max_seconds, seconds)
+        if start is not None:
+            if self._last_start is not None:
+                interval = start - self._last_start
+                self.max_interval = max(self.max_interval, interval)
+            self._last_start = start
+        if status:
+            # sounddevice CallbackFlags, only built when PortAudio flags something
+            for flag in STATUS_FLAGS:
+                if getattr(status, flag, False):
+                    self.status[flag] += 1
+
+
+class Metrics:
+    # Registry behind the Prometheus endpoint and the JSON snapshots. Audio
+    # callbacks only touch their StreamMetrics; every other value is a
+    # callable sampled at export time on the exporter's thread, so ring
+    # fill, drops and PTT airtime cost the audio path nothing extra.
+
+    def __init__(self, port=None, json_path=None, interval=10.0, host="127.0.0.1"):
+        self.port = port
+        self.json_path = json_path
+        self.interval = interval
+        self.host = host
+        self.streams = []
+        # name -> (type, description, fn returning {((label, value), ...): sample})
+        self.samples = {}
+        self._server = None
+        self._threads = []
+        self._stop = threading.Event()
+
+    def stream(self, name, kind):
+        metrics = StreamMetrics(name, kind)
+        self.streams.append(metrics)
+        return metrics
+
+    def gauge(self, name, description, fn):
+        self.samples[name] = ("gauge", description, fn)
+
+    def counter(self, name, description, fn):
+        self.samples[name] = ("counter", description, fn)
+
+    # === Export ===
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        lines = [
+            "# HELP ptt_callback_seconds Audio callback duration",
+            "# TYPE ptt_callback_seconds histogram",
+        ]
+        for s in self.streams:
+            labels = f'stream="{s.name}",kind="{s.kind}"'
+            h = s.callback_seconds
+            counts = list(h.counts)
+            cumulative = 0
+            for bound, n in zip(h.buckets + ["+Inf"], counts):
+                cumulative += n
+                lines.append(
+                    f'ptt_callback_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"ptt_callback_seconds_sum{{{labels}}} {h.sum}")
+            lines.append(f"ptt_callback_seconds_count{{{labels}}} {cumulative}")
+        for name, field, description in (
+            ("ptt_callback_max_seconds", "max_seconds", "Longest audio callback"),
+            (
+                "ptt_callback_max_interval_seconds",
+                "max_interval",
+                "Longest time between two callback starts",
+            ),
+        ):
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+            for s in self.streams:
+                lines.append(f'{name}{{stream="{s.name}"}} {getattr(s, field)}')
+        lines += [
+            "# HELP ptt_stream_status_total PortAudio status flags seen by callbacks",
+            "# TYPE ptt_stream_status_total counter",
+        ]
+        for s in self.streams:
+            for flag, n in s.status.items():
+                lines.append(
+                    f'ptt_stream_status_total{{stream="{s.name}",flag="{flag}"}} {n}'
+                )
+        for name, (kind, description, fn) in self.samples.items():
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+            for labels, value in fn().items():
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(
+                    f"{name}{{{label_text}}} {value}"
+                    if label_text
+                    else f"{name} {value}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {
+            "time": time.time(),
+            "streams": {
+                s.name: {
+                    "kind": s.kind,
+                    "callbacks": s.callback_seconds.count,
+                    "callback_seconds_sum": s.callback_seconds.sum,
+                    "callback_seconds_buckets": dict(
+                        zip(
+                            [str(b) for b in s.callback_seconds.buckets] + ["+Inf"],
+                            s.callback_seconds.counts,
+                        )
+                    ),
+                    "max_seconds": s.max_seconds,
+                    "max_interval": s.max_interval,
+                    "status": dict(s.status),
+                }
+                for s in self.streams
+            },
+            **{
+                name: [
+                    {**dict(labels), "value": value} for labels, value in fn().items()
+                ]
+                for name, (_, _, fn) in self.samples.items()
+            },
+        }
+
+    def write_snapshot(self):
+        # Write-then-rename so readers never see half a file
+        tmp = f"{self.json_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, self.json_path)
+
+    # === Exporter threads ===
+    def _make_server(self):
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes off the console
+
+        return http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+
+    def _snapshots(self):
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def _spawn(self, target, name):
+        def run():
+            try:
+                # Linux applies niceness per thread, keep exporters behind audio
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+            except (AttributeError, OSError):
+                pass
+            target()
+
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        self._stop.clear()
+        if self.port is not None:
+            # Bound here so a busy port fails start() rather than a thread
+            self._server = self._make_server()
+            self._spawn(self._server.serve_forever, "metrics-http")
+        if self.json_path is not None:
+            self._spawn(self._snapshots, "metrics-json")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.json_path is not None:
+            self.write_snapshot()
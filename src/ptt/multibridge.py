@@ -0,0 +1,656 @@
+# multibridge.py
+import collections
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+import numpy as np
+
+from ptt import backend as backends
+from ptt.bridge import RADIO_DEFAULTS, Bridge, check_routes
+from ptt.catalog import Catalog
+from ptt.drift import DriftCompensator
+from ptt.metrics import Metrics
+from ptt.retention import RetentionManager
+from ptt.ring import SharedRing
+from ptt.scheduler import TxScheduler
+from ptt.telemetry import Telemetry
+
+STATS_INTERVAL = 1.0  # seconds between a worker's stream stats messages
+
+# A route a worker only knows by its board index, for DTMF commands that
+# link or unlink routes of other radios
+LinkedRoute = collections.namedtuple("LinkedRoute", "src dst index")
+
+
+class Board:
+    # Key-up handshake between the radio workers and the supervisor, one
+    # float64 array in shared memory. Every field has a single writer:
+    #   want[route]        the source's worker, 1 while its over wants the
+    #                      route's destination keyed
+    #   keyed/keyed_at     the supervisor, per radio
+    #   level/active       the radio's worker, for the console
+    # except linked[route], Bridge.links, which any worker decoding a DTMF
+    # link/unlink command writes; the last command wins.
+    def __init__(self, routes, radios, name=None):
+        from multiprocessing import shared_memory
+
+        self.shape = (routes, radios)
+        length = 2 * routes + 4 * radios
+        size = length * np.dtype(np.float64).itemsize
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        fields = np.ndarray((length,), np.float64, buffer=self.shm.buf)
+        self.want = fields[:routes]
+        self.linked = fields[routes : 2 * routes]
+        self.keyed, self.keyed_at, self.level, self.active = fields[
+            2 * routes :
+        ].reshape(4, radios)
+        if name is None:
+            self.linked.fill(1)
+
+    def __reduce__(self):
+        return Board, (*self.shape, self.name)
+
+    def close(self, unlink=False):
+        del self.want, self.linked, self.keyed, self.keyed_at, self.level, self.active
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class BoardFlags:
+    # Read-only {radio: keyed} view of the board for Bridge.process_input
+    def __init__(self, array, slots):
+        self.array = array
+        self.slots = slots
+
+    def __getitem__(self, key):
+        return self.array[self.slots[key]] != 0
+
+
+class BoardTelemetry:
+    # Telemetry stand-in inside a worker: levels go to the board, and the
+    # supervisor prints them along with the events it derives from them
+    def __init__(self, board):
+        self.board = board
+
+    def publish(self, slot, level, state=0):
+        self.board.level[slot] = level
+        self.board.active[slot] = state
+
+    def event(self, message):
+        pass
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+
+class RadioWorker(Bridge):
+    # One radio's share of a MultiBridge, alone in its process: its input
+    # stream (VOX, pre-roll, recorder, writes into its outgoing routes) and
+    # its output stream (mix of its incoming routes). It is a Bridge over
+    # that radio, its neighbours' configs and the routes touching it, with
+    # DSP state for its own radio only. Route rings are the supervisor's
+    # SharedRings, and instead of keying PTT the worker raises want flags
+    # on the board and replays once the supervisor reports its
+    # destinations keyed. Stream stats, the rt_profile report and saved
+    # recordings go to the supervisor over `events`.
+
+    def __init__(self, key, radios, routes, rings, slots, board, events, **options):
+        # routes: the whole MultiBridge's, in board order. Indexed before
+        # Bridge.__init__, whose DTMF commands may name any of them
+        self.route_indices = {route: i for i, route in enumerate(routes)}
+        touching = {route: gain for route, gain in routes.items() if key in route}
+        near = {k for route in touching for k in route} | {key}
+        super().__init__(
+            {k: cfg for k, cfg in radios.items() if k in near},
+            touching,
+            local=[key],
+            telemetry_rate=0,
+            **options,
+        )
+        self.key = key
+        self.board = board
+        self.events = events
+        self.slots = slots  # the board's numbering, not this Bridge's
+        for route in self.routes:
+            route.index = self.route_indices[(route.src, route.dst)]
+            route.ring = rings[route.index]
+            if isinstance(route.reader, DriftCompensator):
+                route.reader = DriftCompensator(route.ring, self.blocksize)
+            else:
+                route.reader = route.ring
+        self.keyed = BoardFlags(board.keyed, self.slots)
+        self.links = board.linked
+        self.telemetry = BoardTelemetry(board)
+        self._report_after = 0.0
+        if self.rt_profile is not None:
+            # Reported by the supervisor, not on this process's stdout
+            self._report_after = self.rt_profile.report_after
+            self.rt_profile.report_after = 0
+        self._done = threading.Event()
+        self._publisher = None
+
+    def _parse_command(self, action):
+        verb, src, dst = action.split()
+        index = self.route_indices.get((src, dst))
+        if verb in ("link", "unlink") and index is not None:
+            return verb == "link", LinkedRoute(src, dst, index)
+        return super()._parse_command(action)  # raises
+
+    # === PTT requests, through the board ===
+    def _key_destinations(self, src):
+        for route in self.outgoing[src]:
+            if route.linked:
+                self.board.want[route.index] = 1
+
+    def _hold_destinations(self, src, now):
+        ready_at = None
+        for route in self.outgoing[src]:
+            slot = self.slots[route.dst]
+            if route.linked and self.board.keyed[slot]:
+                ready = (
+                    self.board.keyed_at[slot] + self.radios[route.dst]["keyup_delay"]
+                )
+                ready_at = ready if ready_at is None else max(ready_at, ready)
+        return ready_at
+
+    def _unkey_destinations(self, src, now):
+        for route in self.outgoing[src]:
+            self.board.want[route.index] = 0
+
+    def _saved(self, filename):
+        self.events.put(("saved", self.key, filename))
+
+    def _publish(self):
+        waited = 0.0
+        rt_pending = self.rt_profile is not None
+        while not self._done.wait(STATS_INTERVAL):
+            waited += STATS_INTERVAL
+            self.events.put(("streams", self.key, self.metrics.streams))
+            if rt_pending and waited >= self._report_after:
+                # Every callback has had time to run once
+                rt_pending = False
+                self.events.put(("rt", self.key, self.rt_profile.lines()))
+        self.events.put(("streams", self.key, self.metrics.streams))
+
+    def start(self):
+        key = self.key
+        cfg = self.radios[key]
+        if self.rt_profile is not None:
+            self.rt_profile.apply(idle=lambda: not self.state[key]["active"])
+        if key in self.recorders:
+            self.recorders[key].start()
+        if self.incoming[key]:
+            self.streams.append(
+                self.backend.output_stream(
+                    cfg["index"],
+                    self.sample_rate,
+                    self.device_blocksize,
+                    self._output_callback(key),
+                )
+            )
+        if self.outgoing[key]:
+            self.streams.append(
+                self.backend.input_stream(
+                    cfg["index"],
+                    self.sample_rate,
+                    self.device_blocksize,
+                    self._input_callback(key),
+                )
+            )
+        for stream in self.streams:
+            stream.start()
+        self._publisher = threading.Thread(
+            target=self._publish, name="publisher", daemon=True
+        )
+        self._publisher.start()
+        return self
+
+    def stop(self):
+        for stream in self.streams:
+            stream.stop()
+            stream.close()
+        self.streams = []
+        if self._publisher is not None:
+            # Last, so the final totals get through
+            self._done.set()
+            self._publisher.join()
+            self._publisher = None
+        self._unkey_destinations(self.key, None)
+        if self.key in self.recorders:
+            self.recorders[self.key].stop()
+        if self.catalog is not None:
+            self.catalog.close()
+        if self.rt_profile is not None:
+            self.rt_profile.stop()
+
+
+def _worker(key, radios, routes, rings, slots, board, events, options, core, stop):
+    # Ctrl-C reaches the whole process group; the supervisor shuts us down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if core is not None:
+        try:
+            os.sched_setaffinity(0, {core})
+        except (AttributeError, OSError):
+            pass
+    worker = RadioWorker(
+        key, radios, routes, rings, slots, board, events, **options
+    ).start()
+    try:
+        stop.wait()
+    finally:
+        worker.stop()
+
+
+class MultiBridge:
+    # The Bridge split across processes so radios stop sharing one GIL:
+    # every radio with a route runs as a RadioWorker in its own process
+    # (pinned to its own core when pin_cores is set, core 0 left to the
+    # supervisor and the OS) and audio crosses between them through one
+    # SharedRing per route. This supervisor process owns the GPIO lines
+    # and the TX scheduler, polls the board every `poll` seconds to key
+    # and unkey destinations, and runs the console, metrics and
+    # retention. Workers send their callback stats, rt_profile report and
+    # saved files back over a queue, so the metrics export and the console
+    # cover every stream. Options not listed here are passed to every
+    # worker's Bridge; an rt_profile applies per worker, whose process pin
+    # its audio threads inherit unless the profile names `cores`. Workers
+    # are spawned, so `backend` must pickle (the hardware one does;
+    # MockBackend's virtual clock cannot span processes).
+
+    def __init__(
+        self,
+        radios,
+        routes,
+        sample_rate=44100,
+        blocksize=1024,
+        internal_rate=None,
+        ring_blocks=8,
+        ring_prefill=2,
+        telemetry_rate=5,
+        record_path=None,
+        record_catalog=True,
+        retention=None,
+        metrics_port=None,
+        metrics_json=None,
+        metrics_interval=10.0,
+        poll=0.005,
+        pin_cores=True,
+        backend=None,
+        **options,
+    ):
+        self.radios = {
+            key: {**RADIO_DEFAULTS, "label": key, **cfg} for key, cfg in radios.items()
+        }
+        check_routes(self.radios, routes)
+        self.routes = list(routes)
+        self.backend = backend or backends.default()
+        self.clock = self.backend.clock
+        self.poll = poll
+        self.pin_cores = pin_cores
+        self.options = {
+            "sample_rate": sample_rate,
+            "blocksize": blocksize,
+            "internal_rate": internal_rate,
+            "ring_blocks": ring_blocks,
+            "ring_prefill": ring_prefill,
+            "record_path": record_path,
+            "record_catalog": record_catalog,
+            "backend": self.backend,
+            **options,
+        }
+        self.route_gains = dict(routes)
+
+        # Sized like the rings each worker's Bridge would build for itself
+        rate = internal_rate or sample_rate
+        if sample_rate % rate:
+            raise ValueError(
+                f"internal_rate {rate} must divide sample_rate {sample_rate}"
+            )
+        block = blocksize // (sample_rate // rate)
+        self.rings = [
+            SharedRing(block * ring_blocks, prefill=block * ring_prefill)
+            for _ in self.routes
+        ]
+        self.board = Board(len(self.routes), len(self.radios))
+        self.slots = {key: i for i, key in enumerate(self.radios)}
+        self.feeds = {
+            key: [i for i, (_, dst) in enumerate(self.routes) if dst == key]
+            for key in self.radios
+        }
+        self.sources = {
+            key: [i for i, (src, _) in enumerate(self.routes) if src == key]
+            for key in self.radios
+        }
+        self.workers = {}
+        self.failed = []
+        self.events = None  # worker → supervisor queue, made in start()
+        self._stop_workers = None  # their stop flag, likewise
+        self.worker_streams = {}  # StreamMetrics by name, latest per worker
+        self.rt_reports = {}  # radio -> report lines
+
+        # === Per-destination PTT state ===
+        self.scheduler = TxScheduler(self.clock, self.backend.sleep)
+        self.ptt = {}
+        self.wanted = {key: False for key in self.radios}
+        self.keyed = {key: False for key in self.radios}
+        self.keyed_at = {key: 0 for key in self.radios}
+        self.key_counts = {key: 0 for key in self.radios}
+        self.keyed_seconds = {key: 0.0 for key in self.radios}
+        self._active = {key: False for key in self.radios}
+        self._linked = [True] * len(self.routes)
+
+        self.telemetry = Telemetry(
+            [cfg["label"] for cfg in self.radios.values()],
+            states=("RX", "VOX"),
+            rate=telemetry_rate,
+        )
+        self.messages = {
+            key: {
+                "vox": f"[{cfg['label']}] 🎤 Signal Confirmed",
+                "silence": f"[{cfg['label']}] 💤 Silence",
+                "on": f"[{cfg['label']}] 📡 GPIO {cfg.get('gpio')} ON",
+                "off": f"[{cfg['label']}] ⚪ GPIO {cfg.get('gpio')} OFF",
+                "cut": f"[{cfg['label']}] ⏱️ TX limit, GPIO {cfg.get('gpio')} OFF",
+            }
+            for key, cfg in self.radios.items()
+        }
+
+        # Opened here first so the schema exists before the workers open it
+        self.catalog = None
+        if record_path is not None and record_catalog:
+            self.catalog = Catalog(os.path.join(record_path, "catalog.db"))
+        self.retention = None
+        if record_path is not None and retention:
+            self.retention = RetentionManager(
+                [record_path],
+                catalog=self.catalog,
+                on_warning=self.telemetry.event,
+                **retention,
+            )
+
+        self.metrics = Metrics(
+            port=metrics_port, json_path=metrics_json, interval=metrics_interval
+        )
+        self._register_metrics()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _register_metrics(self):
+        routes = {
+            (("src", src), ("dst", dst)): ring
+            for (src, dst), ring in zip(self.routes, self.rings)
+        }
+        radios = {(("radio", key),): key for key in self.radios}
+        m = self.metrics
+        m.gauge(
+            "ptt_ring_fill_frames",
+            "Frames buffered per route",
+            lambda: {k: ring.fill() for k, ring in routes.items()},
+        )
+        m.counter(
+            "ptt_ring_overrun_frames_total",
+            "Frames dropped because a route ring was full",
+            lambda: {k: ring.overruns for k, ring in routes.items()},
+        )
+        m.counter(
+            "ptt_ring_underrun_frames_total",
+            "Frames zero-filled because a route ring was empty",
+            lambda: {k: ring.underruns for k, ring in routes.items()},
+        )
+        m.gauge(
+            "ptt_keyed",
+            "1 while the radio's PTT is on",
+            lambda: {k: int(self.keyed[key]) for k, key in radios.items()},
+        )
+        m.counter(
+            "ptt_key_total",
+            "PTT key-ups",
+            lambda: {k: self.key_counts[key] for k, key in radios.items()},
+        )
+        m.gauge(
+            "ptt_duty_ratio",
+            "Share of the duty cycle window spent transmitting",
+            lambda: {
+                (("radio", key),): s["duty"]
+                for key, s in self.scheduler.stats().items()
+            },
+        )
+        m.gauge(
+            "ptt_route_linked",
+            "1 while the route is linked, DTMF commands change it",
+            lambda: {k: int(self.board.linked[i]) for i, k in enumerate(routes)},
+        )
+        m.gauge(
+            "ptt_worker_up",
+            "1 while the radio's worker process is alive",
+            lambda: {
+                (("radio", key),): int(p.is_alive()) for key, p in self.workers.items()
+            },
+        )
+
+    # === Supervisor thread ===
+    def _set_keyed(self, key, keyed, now, message):
+        slot = self.slots[key]
+        if keyed:
+            # keyed_at first, workers read it once they see the flag
+            self.board.keyed_at[slot] = now
+            self.board.keyed[slot] = 1
+            self.keyed_at[key] = now
+            self.key_counts[key] += 1
+        else:
+            self.board.keyed[slot] = 0
+            self.keyed_seconds[key] += now - self.keyed_at[key]
+        self.keyed[key] = keyed
+        self.telemetry.event(self.messages[key][message])
+
+    def _update_ptt(self, now):
+        want = self.board.want
+        for key in self.ptt:
+            wanted = any(want[i] for i in self.feeds[key])
+            if wanted != self.wanted[key]:
+                self.wanted[key] = wanted
+                if not wanted:
+                    # Also lifts a time-out lockout
+                    self.scheduler.release(key, now)
+                    if self.keyed[key]:
+                        self._set_keyed(key, False, now, "off")
+                    continue
+            if not wanted:
+                continue
+            if not self.keyed[key]:
+                if self.scheduler.acquire(key, now):
+                    self._set_keyed(key, True, now, "on")
+            elif not self.scheduler.check(key, now):
+                self._set_keyed(key, False, now, "cut")
+
+    def _update_console(self):
+        for key, slot in self.slots.items():
+            active = bool(self.board.active[slot])
+            if active != self._active[key]:
+                self._active[key] = active
+                self.telemetry.event(self.messages[key]["vox" if active else "silence"])
+            self.telemetry.publish(slot, self.board.level[slot], int(active))
+        for i, (src, dst) in enumerate(self.routes):
+            # Workers cannot print, report their DTMF link commands here
+            linked = bool(self.board.linked[i])
+            if linked != self._linked[i]:
+                self._linked[i] = linked
+                self.telemetry.event(
+                    f"[{src} → {dst}] {'🔗 Linked' if linked else '✂️ Unlinked'}"
+                )
+
+    def _check_workers(self):
+        for key, process in self.workers.items():
+            if key not in self.failed and not process.is_alive():
+                # Its overs can no longer end, drop what it asked for
+                self.failed.append(key)
+                for i in self.sources[key]:
+                    self.board.want[i] = 0
+                self.telemetry.event(
+                    f"[{self.radios[key]['label']}] ⚠️ Worker exited ({process.exitcode})"
+                )
+
+    def _drain_events(self):
+        while True:
+            try:
+                kind, key, payload = self.events.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+            if kind == "streams":
+                for stream in payload:
+                    self.worker_streams[stream.name] = stream
+                # One assignment, an export in progress keeps the old list
+                self.metrics.streams = list(self.worker_streams.values())
+            elif kind == "rt":
+                self.rt_reports[key] = payload
+                for line in payload:
+                    self.telemetry.event(f"[{self.radios[key]['label']}] {line}")
+            elif kind == "saved":
+                self.telemetry.event(f"[REC] Saved {payload}")
+                if self.retention is not None:
+                    self.retention.add(payload)
+
+    def _run(self):
+        polls = 0
+        while not self._stop.wait(self.poll):
+            self._update_ptt(self.clock())
+            self._update_console()
+            polls += 1
+            if polls * self.poll >= 1.0:
+                polls = 0
+                self._check_workers()
+                self._drain_events()
+
+    # === Lifecycle ===
+    def start(self):
+        for key, cfg in self.radios.items():
+            if self.feeds[key]:
+                self.ptt[key] = self.backend.ptt(cfg["gpio"])
+                self.scheduler.register(
+                    key,
+                    self.ptt[key],
+                    timeout=cfg["tx_timeout"],
+                    duty_cycle=cfg["duty_cycle"],
+                    window=cfg["duty_window"],
+                    gap=cfg["tx_gap"],
+                )
+        self.scheduler.start()
+
+        # Spawned rather than forked: the supervisor's threads and locks
+        # stay behind, each worker imports a clean interpreter
+        context = multiprocessing.get_context("spawn")
+        self._stop_workers = context.Event()
+        self.events = context.Queue()
+        cores = None
+        if self.pin_cores and hasattr(os, "sched_getaffinity"):
+            cores = sorted(os.sched_getaffinity(0))
+        keys = [key for key in self.radios if self.feeds[key] or self.sources[key]]
+        radios = {key: dict(cfg) for key, cfg in self.radios.items()}
+        for i, key in enumerate(keys):
+            core = cores[(i + 1) % len(cores)] if cores else None
+            self.workers[key] = context.Process(
+                target=_worker,
+                args=(
+                    key,
+                    radios,
+                    self.route_gains,
+                    {i: self.rings[i] for i in self.sources[key] + self.feeds[key]},
+                    self.slots,
+                    self.board,
+                    self.events,
+                    self.options,
+                    core,
+                    self._stop_workers,
+                ),
+                name=f"radio-{key}",
+                daemon=True,
+            )
+            self.workers[key].start()
+
+        self.telemetry.start()
+        if self.retention is not None:
+            self.retention.start()
+        self.metrics.start()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="supervisor", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # Also after a start() that never ran or failed part way: whatever
+        # was started is stopped and every PTT line is released
+        if self._stop_workers is not None:
+            self._stop_workers.set()
+        for process in self.workers.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.events is not None:
+            self._drain_events()  # the workers' final stream totals
+        self.scheduler.stop()
+        self.metrics.stop()
+        if self.retention is not None:
+            self.retention.stop()
+        if self.catalog is not None:
+            self.catalog.close()
+        self.telemetry.stop()
+
+    def close(self):
+        # Frees the shared memory and the queue; after report()
+        if self.events is not None:
+            self.events.close()
+        for ring in self.rings:
+            ring.close(unlink=True)
+        self.board.close(unlink=True)
+
+    def report(self):
+        for (src, dst), ring in zip(self.routes, self.rings):
+            print(
+                f"[{src} → {dst}] Ring overruns: {ring.overruns} frames, "
+                f"underruns: {ring.underruns} frames"
+            )
+        for s in self.worker_streams.values():
+            print(
+                f"[{s.name}] {s.callback_seconds.count} callbacks, "
+                f"max {s.max_seconds * 1000:.2f} ms, "
+                f"max interval {s.max_interval * 1000:.1f} ms, "
+                f"xruns {s.status['input_overflow'] + s.status['output_underflow']}"
+            )
+        for key, lines in self.rt_reports.items():
+            for line in lines:
+                print(f"[{self.radios[key]['label']}] {line}")
+        self.scheduler.report()
+        for key in self.failed:
+            print(f"[{key}] ⚠️ Worker exited with code {self.workers[key].exitcode}")
+
+    def run(self):
+        try:
+            self.start()
+            while not self.failed:
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("\n🛑 Exiting cleanly...")
+        finally:
+            self.stop()
+            self.report()
+            self.close()
+            print("✅ All GPIOs released. Workers stopped.")
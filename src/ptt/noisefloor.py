@@ -0,0 +1,237 @@
+# noisefloor.py
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from ptt import backend as backends
+from ptt import dsp
+
+
+class NoiseFloor:
+    # Running estimate of a receiver's noise floor and the VOX threshold
+    # derived from it. Every block's RMS goes into a histogram of levels in
+    # `step_db` bins whose counts fade with a half-life of `window` seconds;
+    # the floor is its `percentile`, and the threshold sits `margin_db`
+    # above that, clamped to [min_threshold, max_threshold]. Overs only
+    # fill the upper bins, so as long as the channel is quiet more than
+    # `percentile` percent of the time they do not lift the floor, while a
+    # squelch left open or a noisier site does within a window or so.
+    #
+    # update() is O(1) per block: instead of fading every bin, the weight
+    # of new blocks grows and the counts are rescaled once it gets large.
+    # The percentile is recomputed twice a second, and threshold stays None
+    # until `warmup` seconds have been seen.
+
+    def __init__(
+        self,
+        block_seconds,
+        percentile=20.0,
+        margin_db=10.0,
+        window=60.0,
+        warmup=3.0,
+        min_threshold=0.003,
+        max_threshold=0.3,
+        low_db=-90.0,
+        high_db=0.0,
+        step_db=0.5,
+    ):
+        self.percentile = percentile
+        self.margin_db = margin_db
+        self.margin = 10 ** (margin_db / 20)
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.low_db = low_db
+        self.step_db = step_db
+        self.bins = round((high_db - low_db) / step_db)
+        self.counts = np.zeros(self.bins)
+        self._cumulative = np.zeros(self.bins)
+        self._growth = 0.5 ** (-block_seconds / window)
+        self._weight = 1.0
+        self._every = max(1, round(0.5 / block_seconds))
+        self._warmup = math.ceil(warmup / block_seconds)
+
+        self.blocks = 0
+        self.floor = None
+        self.threshold = None
+
+    def update(self, rms):
+        # True when threshold changed
+        db = 20 * math.log10(rms) if rms > 0 else self.low_db
+        i = min(self.bins - 1, max(0, int((db - self.low_db) / self.step_db)))
+        self.counts[i] += self._weight
+        self._weight *= self._growth
+        if self._weight > 1e6:
+            self.counts *= 1 / self._weight
+            self._weight = 1.0
+        self.blocks += 1
+        if self.blocks < self._warmup or self.blocks % self._every:
+            return False
+
+        self.floor = self.level(self.percentile)
+        threshold = min(
+            max(self.floor * self.margin, self.min_threshold), self.max_threshold
+        )
+        changed = threshold != self.threshold
+        self.threshold = threshold
+        return changed
+
+    def level(self, percentile):
+        # RMS at `percentile` of the weighted histogram, bin centre
+        np.cumsum(self.counts, out=self._cumulative)
+        target = self._cumulative[-1] * percentile / 100
+        i = min(self.bins - 1, int(np.searchsorted(self._cumulative, target)))
+        return 10 ** ((self.low_db + (i + 0.5) * self.step_db) / 20)
+
+
+def db(rms):
+    return 20 * math.log10(max(rms, 1e-9))
+
+
+# === Calibration ===
+def measure(device, seconds, sample_rate=44100, blocksize=1024, backend=None):
+    # RMS of every block captured from `device` over `seconds`
+    backend = backend or backends.default()
+    levels = np.zeros(int(seconds * sample_rate / blocksize))
+    filled = [0]
+
+    def callback(indata, frames, time_info, status):
+        n = filled[0]
+        if n < len(levels):
+            levels[n] = dsp.rms(indata)
+            filled[0] = n + 1
+
+    stream = backend.input_stream(device, sample_rate, blocksize, callback)
+    stream.start()
+    try:
+        while filled[0] < len(levels):
+            backend.sleep(0.1)
+    finally:
+        stream.stop()
+        stream.close()
+    return levels
+
+
+def tune(idle, speech, percentile=20.0):
+    # Settings from idle and speech block levels: the threshold splits the
+    # loudest idle blocks from the quiet end of speech (geometric mean of
+    # the idle p99 and the speech p10), and margin_db places it relative
+    # to the floor NoiseFloor will track. None if no speech stood out.
+    floor = float(np.percentile(idle, percentile))
+    idle_peak = float(np.percentile(idle, 99))
+    voiced = speech[speech > 2 * idle_peak]  # 6 dB above anything idle
+    if len(voiced) < 0.2 * len(speech):
+        return None
+    speech_low = float(np.percentile(voiced, 10))
+    threshold = math.sqrt(idle_peak * speech_low)
+    return {
+        "threshold": round(threshold, 4),
+        "noise_floor": {
+            "percentile": percentile,
+            "margin_db": round(max(3.0, db(threshold) - db(floor)), 1),
+        },
+        "silence_threshold": f"{threshold * 100:.2g}%",  # sox, for ptt.record
+        "idle_floor": round(floor, 5),
+        "idle_peak": round(idle_peak, 5),
+        "speech_low": round(speech_low, 5),
+        "speech_median": round(float(np.median(voiced)), 5),
+        "voiced_share": round(len(voiced) / len(speech), 2),
+        "calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def calibrate(
+    device,
+    radio,
+    output="calibration.json",
+    idle_seconds=10.0,
+    speech_seconds=10.0,
+    sample_rate=44100,
+    blocksize=1024,
+    percentile=20.0,
+    backend=None,
+):
+    # Interactive: measures the idle channel, then someone talking, and
+    # merges the tuned settings for `radio` into `output`
+    backend = backend or backends.default()
+    print(
+        f"🤫 [{radio}] Measuring the idle channel for {idle_seconds:.0f}s, keep quiet..."
+    )
+    idle = measure(device, idle_seconds, sample_rate, blocksize, backend)
+    print(
+        f"   floor {db(np.percentile(idle, percentile)):.1f} dBFS, "
+        f"peak {db(np.percentile(idle, 99)):.1f} dBFS"
+    )
+    print(f"🎤 [{radio}] Now talk on the channel for {speech_seconds:.0f}s...")
+    speech = measure(device, speech_seconds, sample_rate, blocksize, backend)
+
+    settings = tune(idle, speech, percentile)
+    if settings is None:
+        print("⚠️ No speech stood out from the idle level, nothing written.")
+        return None
+    print(
+        f"   speech {db(settings['speech_median']):.1f} dBFS median, "
+        f"{settings['voiced_share']:.0%} voiced"
+    )
+
+    tuned = {}
+    if os.path.exists(output):
+        with open(output) as f:
+            tuned = json.load(f)
+    tuned[radio] = settings
+    with open(output, "w") as f:
+        json.dump(tuned, f, indent=2)
+        f.write("\n")
+    print(
+        f"✅ [{radio}] threshold {settings['threshold']} "
+        f"({settings['noise_floor']['margin_db']} dB over the floor) → {output}"
+    )
+    return settings
+
+
+def load_settings(path, radios):
+    # Copy of a Bridge `radios` dict with the calibrated threshold and
+    # noise_floor options of every radio found in `path`
+    with open(path) as f:
+        tuned = json.load(f)
+    radios = {key: dict(cfg) for key, cfg in radios.items()}
+    for key, cfg in radios.items():
+        if key in tuned:
+            cfg["threshold"] = tuned[key]["threshold"]
+            if cfg.get("noise_floor") is not None:
+                cfg["noise_floor"] = {
+                    **cfg["noise_floor"],
+                    **tuned[key]["noise_floor"],
+                }
+    return radios
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Noise floor tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    cal = commands.add_parser(
+        "calibrate", help="measure idle and speech levels, write tuned settings"
+    )
+    cal.add_argument("device", help="input device, sounddevice index or name")
+    cal.add_argument("--radio", required=True, help="key of the radio in DEVICES")
+    cal.add_argument("--output", default="calibration.json")
+    cal.add_argument("--idle", type=float, default=10.0, help="seconds of idle")
+    cal.add_argument("--speech", type=float, default=10.0, help="seconds of talk")
+    cal.add_argument("--sample-rate", type=int, default=44100)
+    cal.add_argument("--blocksize", type=int, default=1024)
+    cal.add_argument("--percentile", type=float, default=20.0)
+    args = parser.parse_args()
+
+    calibrate(
+        int(args.device) if args.device.isdigit() else args.device,
+        args.radio,
+        output=args.output,
+        idle_seconds=args.idle,
+        speech_seconds=args.speech,
+        sample_rate=args.sample_rate,
+        blocksize=args.blocksize,
+        percentile=args.percentile,
+    )
@@ -1,8 +1,8 @@
 # play_recording.py
-import subprocess
 import os
-import time
-from gpiozero import LED
+
+from ptt import backend as backends
+from ptt.scheduler import TxScheduler
 
 
 def start(
@@ -10,22 +10,25 @@ def start(
     PTT_PIN: int = 17,
     SAVE_PATH: str = "./wav",
     INPUT_FILE: str = "last_recording.wav",
+    KEYUP_DELAY: float = 0.3,
+    TX_TIMEOUT: float = 180.0,
+    BACKEND=None,
 ):
+    backend = BACKEND or backends.default()
     filepath = os.path.join(SAVE_PATH, INPUT_FILE)
-    ptt = LED(PTT_PIN)
-    ptt.off()
+    scheduler = TxScheduler(backend.clock, backend.sleep)
+    scheduler.register(PTT_PIN, backend.ptt(PTT_PIN), timeout=TX_TIMEOUT)
 
     if not os.path.exists(filepath):
         print("❌ No recording found to play.")
         exit()
 
-    print("📡 Transmitting recording...")
-    ptt.on()
-    time.sleep(0.3)  # Wait for radio to go TX
-
-    subprocess.run(
-        ["aplay", "-D", DEVICE_OUT, "-r", "8000", "-f", "S16_LE", "-c", "1", filepath]
-    )
+    def play(seconds):
+        backend.sleep(KEYUP_DELAY)  # Wait for radio to go TX
+        backend.play_file(DEVICE_OUT, filepath, 8000, max_seconds=seconds - KEYUP_DELAY)
 
-    ptt.off()
+    print("📡 Transmitting recording...")
+    scheduler.start()
+    scheduler.transmit(PTT_PIN, play)
+    scheduler.stop()
     print("✅ Done playing.")
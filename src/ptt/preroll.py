@@ -0,0 +1,61 @@
+# preroll.py
+import math
+
+import numpy as np
+
+
+class PreRoll:
+    # Lookback ring holding the most recent input blocks of one HT. While VOX
+    # is confirming and the far radio keys up, the over keeps landing here;
+    # once the radio is in TX it is replayed from just before the trigger,
+    # skipping quiet blocks until playback has caught up with live input.
+    # All storage is allocated up front, nothing is allocated per block.
+
+    def __init__(
+        self, seconds, sample_rate, blocksize, lookback=0.3, catch_up=0.1, channels=1
+    ):
+        self.blocksize = blocksize
+        self.size = max(2, math.ceil(seconds * sample_rate / blocksize))
+        self.lookback = math.ceil(lookback * sample_rate / blocksize)
+        self.max_lag = max(1, math.ceil(catch_up * sample_rate / blocksize))
+        self.blocks = np.zeros((self.size, blocksize, channels), dtype=np.float32)
+        self.levels = np.zeros(self.size, dtype=np.float32)
+        self._slots = list(self.blocks)  # one view per slot, built once
+        # Monotonic block counters, slot = counter % size
+        self.write_pos = 0
+        self.read_pos = 0
+        self.trigger_pos = 0
+
+    def write(self, block, level, gain=1.0):
+        slot = self.write_pos % self.size
+        np.multiply(block, gain, out=self._slots[slot])
+        self.levels[slot] = level
+        self.write_pos += 1
+        if self.write_pos - self.read_pos > self.size:
+            # Reader was lapped, the oldest audio is gone
+            self.read_pos = self.write_pos - self.size
+
+    def mark(self):
+        # Rewind to `lookback` blocks before the block that just triggered VOX.
+        # The lookback is quiet by definition, so it is never skipped.
+        self.trigger_pos = self.write_pos
+        self.read_pos = max(
+            self.write_pos - 1 - self.lookback, self.write_pos - self.size, 0
+        )
+
+    def lag(self):
+        return self.write_pos - self.read_pos
+
+    def read(self, out, skip_below=0.0):
+        while (
+            self.lag() > self.max_lag
+            and self.read_pos >= self.trigger_pos
+            and self.levels[self.read_pos % self.size] < skip_below
+        ):
+            self.read_pos += 1
+        if self.read_pos >= self.write_pos:
+            out.fill(0)
+            return False
+        np.copyto(out, self._slots[self.read_pos % self.size])
+        self.read_pos += 1
+        return True
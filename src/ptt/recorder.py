@@ -0,0 +1,195 @@
+# recorder.py
+import collections
+import os
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+from ptt.catalog import LEVEL_WINDOW, RECORDER_PREFIX, Levels
+from ptt.ring import RingBuffer
+
+# Archive formats: name -> (container, subtype, extension). All of them are
+# encoded incrementally by libsndfile as the writer thread streams blocks in.
+ARCHIVE_FORMATS = {
+    "wav": ("WAV", "PCM_16", "wav"),  # 16 bit PCM, as sox writes
+    "flac": ("FLAC", "PCM_16", "flac"),  # lossless, any sample rate
+    "adpcm": ("WAV", "IMA_ADPCM", "wav"),  # 4 bits per sample, cheapest to encode
+    "opus": ("OGG", "OPUS", "opus"),  # lossy, smallest; 8/12/16/24/48 kHz only
+    "vorbis": ("OGG", "VORBIS", "ogg"),
+}
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class StreamRecorder:
+    # Background writer for one audio source. The audio callback only copies
+    # blocks into a bounded RingBuffer and queues start/stop markers; a writer
+    # thread streams the ring into an open SoundFile while the over is still
+    # in progress and splits it into a new file every `max_seconds`. If the
+    # disk stalls for longer than the ring holds, audio is dropped and counted
+    # in ring.overruns rather than blocking the callback. `archive` picks one
+    # of ARCHIVE_FORMATS; the compressed ones cut flash writes several-fold.
+
+    def __init__(
+        self,
+        key,
+        save_path="recordings",
+        sample_rate=44100,
+        channels=1,
+        max_seconds=30,
+        ring_seconds=5.0,
+        archive="wav",
+        compression_level=None,
+        poll=0.05,
+        on_saved=None,
+        catalog=None,
+    ):
+        self.key = key
+        self.save_path = save_path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.max_frames = int(max_seconds * sample_rate)
+        if archive not in ARCHIVE_FORMATS:
+            raise ValueError(
+                f"Unknown archive format '{archive}', expected one of "
+                f"{', '.join(ARCHIVE_FORMATS)}"
+            )
+        if archive == "opus" and sample_rate not in OPUS_RATES:
+            raise ValueError(
+                f"Opus cannot encode {sample_rate} Hz, use one of {OPUS_RATES} "
+                "or a flac/adpcm archive"
+            )
+        self.format, self.subtype, self.extension = ARCHIVE_FORMATS[archive]
+        self.compression_level = compression_level  # 0..1, FLAC/Opus/Vorbis only
+        self.poll = poll
+        self.on_saved = on_saved
+        self.catalog = catalog  # ptt.catalog.Catalog, a row per closed file
+
+        self.ring = RingBuffer(int(ring_seconds * sample_rate), channels=channels)
+        self._chunk = np.zeros(
+            (int(poll * sample_rate) * 4, channels), dtype=np.float32
+        )
+        # (ring position, start time or None for stop), appended by the callback
+        self._markers = collections.deque()
+        self.recording = False
+
+        self._file = None
+        self._in_over = False
+        self._start_time = 0
+        self._file_frames = 0
+        self._file_start = 0
+        self._over_frames = 0
+        self._levels = None
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(save_path, exist_ok=True)
+
+    # === Called from the audio thread ===
+    def begin(self, start_time):
+        self._markers.append((self.ring.write_index, start_time))
+        self.recording = True
+
+    def write(self, block):
+        if self.recording:
+            self.ring.write(block)
+
+    def end(self):
+        if self.recording:
+            self.recording = False
+            self._markers.append((self.ring.write_index, None))
+
+    # === Writer thread ===
+    def _open(self):
+        start = self._start_time + self._over_frames / self.sample_rate
+        self._file_start = start
+        self._levels = Levels(LEVEL_WINDOW * self.sample_rate)
+        timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(start))
+        filename = os.path.join(
+            self.save_path, f"{RECORDER_PREFIX}{self.key}_{timestamp}.{self.extension}"
+        )
+        self._file = sf.SoundFile(
+            filename,
+            mode="w",
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            format=self.format,
+            subtype=self.subtype,
+            compression_level=self.compression_level,
+        )
+        self._file_frames = 0
+
+    def _close(self):
+        if self._file is None:
+            return
+        filename = self._file.name
+        self._file.close()
+        self._file = None
+        if self.catalog is not None:
+            peak_rms, mean_rms = self._levels.finish()
+            duration = self._file_frames / self.sample_rate
+            self.catalog.add(
+                filename,
+                self.key,
+                self._file_start,
+                duration,
+                peak_rms,
+                mean_rms,
+                offset=self._over_frames / self.sample_rate - duration,
+                size=os.path.getsize(filename),
+                sample_rate=self.sample_rate,
+            )
+        if self.on_saved is not None:
+            self.on_saved(filename)
+
+    def _consume(self, frames):
+        while frames > 0:
+            if self._file is None:
+                self._open()
+            n = min(frames, len(self._chunk), self.max_frames - self._file_frames)
+            self.ring.read(self._chunk[:n])
+            self._file.write(self._chunk[:n])
+            self._levels.update(self._chunk[:n])
+            self._file_frames += n
+            self._over_frames += n
+            frames -= n
+            if self._file_frames >= self.max_frames:
+                self._close()
+
+    def _drain(self):
+        while True:
+            # Snapshot first: a marker queued after this point lies at or past it
+            limit = self.ring.write_index
+            if self._markers and self._markers[0][0] <= limit:
+                position, start_time = self._markers.popleft()
+                self._consume(position - self.ring.read_index)
+                self._close()
+                self._in_over = start_time is not None
+                if self._in_over:
+                    self._start_time = start_time
+                    self._over_frames = 0
+                continue
+            if self._in_over:
+                self._consume(limit - self.ring.read_index)
+            return
+
+    def _run(self):
+        while not self._stop.wait(self.poll):
+            self._drain()
+        self.end()
+        self._drain()
+        self._close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f"recorder-{self.key}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,211 @@
+# repeater.py
+import functools
+import os
+import queue
+import threading
+import time
+
+from ptt import backend as backends
+from ptt.scheduler import TxScheduler
+from ptt.stream import VoxEngine
+
+
+class Repeater:
+    # Long-running store-and-forward (parrot) service. Capture and transmit
+    # run concurrently on their own threads and meet at a bounded queue of
+    # overs, so the next over is being recorded while the previous one is
+    # on air; a cycle costs max(record, play) instead of record + play +
+    # sleep. When transmit falls behind by more than `queue_size` overs the
+    # oldest waiting over is dropped, capture never stops listening.
+    #
+    # io="stream" keeps both sound card directions open in a VoxEngine and
+    # queues PCM in memory. io="subprocess" runs sox/aplay per over like
+    # ptt.record/ptt.play and queues the temporary WAV paths. Either way the
+    # PTT line is keyed through a TX scheduler with `tx_limits`.
+
+    def __init__(
+        self,
+        device_in="plughw:2,0",
+        device_out="plughw:2,0",
+        ptt_pin=17,
+        io="stream",
+        queue_size=4,
+        sample_rate=44100,
+        threshold=0.01,
+        max_silence=2.0,
+        keyup_delay=0.3,
+        vad_kind="rms",
+        save_path="./wav",
+        silence_threshold="1%",
+        tx_limits=None,
+        noise_floor=None,
+        backend=None,
+    ):
+        if io not in ("stream", "subprocess"):
+            raise ValueError(f"Unknown io '{io}', expected 'stream' or 'subprocess'")
+        if queue_size < 1:
+            # queue.Queue(0) would be unbounded and never drop anything
+            raise ValueError(f"queue_size must be at least 1, got {queue_size}")
+        self.io = io
+        self.backend = backend or backends.default()
+        self.device_in = device_in
+        self.device_out = device_out
+        self.keyup_delay = keyup_delay
+        self.max_silence = max_silence
+        self.save_path = save_path
+        self.silence_threshold = silence_threshold
+
+        self._captured = 0
+        self.transmitted = 0
+        self._dropped = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+        if io == "stream":
+            self.engine = VoxEngine(
+                device_in=device_in,
+                device_out=device_out,
+                ptt_pin=ptt_pin,
+                sample_rate=sample_rate,
+                threshold=threshold,
+                max_silence=max_silence,
+                keyup_delay=keyup_delay,
+                vad_kind=vad_kind,
+                backend=self.backend,
+                queue_size=queue_size,
+                tx_limits=tx_limits,
+                noise_floor=noise_floor,
+            )
+            self.overs = self.engine.overs
+            self.scheduler = self.engine.scheduler
+        else:
+            self.engine = None
+            self.overs = queue.Queue(maxsize=queue_size)
+            self.ptt_pin = ptt_pin
+            self.scheduler = TxScheduler(self.backend.clock, self.backend.sleep)
+            self.scheduler.register(
+                ptt_pin, self.backend.ptt(ptt_pin), **(tx_limits or {})
+            )
+            os.makedirs(save_path, exist_ok=True)
+
+    @property
+    def captured(self):
+        return self.engine.captured if self.engine else self._captured
+
+    @property
+    def dropped(self):
+        return self.engine.dropped if self.engine else self._dropped
+
+    # === Capture thread (subprocess io; stream io captures in its callback) ===
+    def _capture(self):
+        n = 0
+        while not self._stop.is_set():
+            path = os.path.join(self.save_path, f"repeater_{n % 1000:03d}.wav")
+            n += 1
+            recorded = self.backend.record_file(
+                self.device_in,
+                path,
+                8000,
+                self.silence_threshold,
+                str(self.max_silence),
+            )
+            if not recorded:
+                # Device gone or busy, do not respawn sox in a tight loop
+                self._stop.wait(1.0)
+            if not os.path.exists(path) or os.path.getsize(path) <= 1000:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            self._captured += 1
+            while True:
+                try:
+                    self.overs.put_nowait(path)
+                    break
+                except queue.Full:
+                    try:
+                        os.remove(self.overs.get_nowait())
+                        self._dropped += 1
+                    except (queue.Empty, FileNotFoundError):
+                        pass
+
+    # === Transmit thread ===
+    def _transmit(self):
+        while not self._stop.is_set():
+            if self.engine is not None:
+                pcm = self.engine.capture(timeout=0.2)
+                if pcm is None:
+                    continue
+                print(
+                    f"📡 Transmitting {len(pcm) / self.engine.sample_rate:.1f}s over..."
+                )
+                self.engine.transmit(pcm)
+            else:
+                try:
+                    over = self.overs.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                print("📡 Transmitting recording...")
+                try:
+                    self.scheduler.transmit(
+                        self.ptt_pin, functools.partial(self._play, over)
+                    )
+                finally:
+                    os.remove(over)
+            self.transmitted += 1
+            print(
+                f"✅ Done playing. {self.overs.qsize()} waiting, {self.dropped} dropped."
+            )
+
+    def _play(self, path, seconds):
+        self.backend.sleep(self.keyup_delay)  # Wait for radio to go TX
+        self.backend.play_file(
+            self.device_out, path, 8000, max_seconds=seconds - self.keyup_delay
+        )
+
+    def start(self):
+        self._stop.clear()
+        if self.engine is not None:
+            self.engine.start()
+        else:
+            self.scheduler.start()
+            self._spawn(self._capture, "repeater-capture")
+        self._spawn(self._transmit, "repeater-transmit")
+        return self
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            # A running sox/aplay finishes its over first
+            thread.join()
+        self._threads = []
+        if self.engine is not None:
+            self.engine.close()
+        else:
+            self.scheduler.stop()
+            while not self.overs.empty():
+                # Untransmitted overs are temporary files too
+                try:
+                    os.remove(self.overs.get_nowait())
+                except (queue.Empty, FileNotFoundError):
+                    pass
+
+    def run(self):
+        print("🎙️ Repeater listening... Speak to record.")
+        try:
+            self.start()
+            while True:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("\n🛑 Exiting cleanly...")
+        finally:
+            self.stop()
+            self.scheduler.report()
+            print(
+                f"✅ {self.captured} overs captured, {self.transmitted} transmitted, "
+                f"{self.dropped} dropped."
+            )
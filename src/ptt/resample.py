@@ -0,0 +1,164 @@
+# resample.py
+import numpy as np
+
+
+def lowpass(taps, cutoff, gain=1.0, beta=7.0):
+    # Kaiser-windowed sinc; cutoff in cycles per sample (0.5 = Nyquist)
+    n = np.arange(taps) - (taps - 1) / 2
+    h = np.sinc(2 * cutoff * n) * np.kaiser(taps, beta)
+    return (h * gain / h.sum()).astype(np.float32)
+
+
+def group_size(frames, minimum):
+    # Smallest divisor of `frames` (low-rate frames per block) that is at
+    # least `minimum`, so a block splits into whole groups
+    for size in range(minimum, frames + 1):
+        if frames % size == 0:
+            return size
+    raise ValueError(f"{frames} frames per block, need at least {minimum}")
+
+
+# Both resamplers are block polyphase filters. The low-rate side of a block
+# is cut into groups of `group` frames, at least taps_per_phase - 1 long, so
+# the FIR reaches back at most into the previous group. A group, taken as
+# one row, times a precomputed matrix gives its contribution to its own
+# group's outputs and to the next group's, for the whole block in one BLAS
+# product; each output group then adds its own part to the part carried
+# from the row before. Per block that is a fixed handful of numpy calls
+# whatever the filter length, with nothing gathered or copied per frame,
+# and every operand is contiguous (numpy buffers, i.e. allocates, for
+# strided ufunc inputs). The last group's carried part is kept for the
+# next block, so consecutive blocks filter as one continuous signal. The
+# default 16 taps per phase with cutoff 0.95 keep the passband flat to
+# 3 kHz at 8820 Hz and images/aliases 75 dB down from 5.5 kHz on.
+
+
+class Decimator:
+    # Integer-factor downsampler at the input device boundary. Output m is
+    # the anti-aliasing FIR over the input frames up to the last of the
+    # `factor` frames it replaces.
+
+    def __init__(self, factor, blocksize, taps_per_phase=16, cutoff=0.95):
+        # blocksize: device frames per block, a multiple of factor
+        self.factor = factor
+        self.group = group = group_size(blocksize // factor, taps_per_phase - 1)
+        width = group * factor  # device frames per group
+        taps = lowpass(factor * taps_per_phase, cutoff * 0.5 / factor)[::-1]
+        # matrix[q, r]: weight of frame q of a group for output r of that
+        # group, matrix[q, group + r] for output r of the next group
+        self.matrix = np.zeros((width, 2 * group), dtype=np.float32)
+        for r in range(group):
+            # Window of output r of the next group, from this group's start
+            start = width + (r + 1 - taps_per_phase) * factor
+            for k, tap in enumerate(taps):
+                segment, q = divmod(start + k, width)
+                self.matrix[q, r if segment else group + r] = tap
+        # Rows of [own | carried] parts after a half row holding the previous
+        # block's last carried part, so that read in rows shifted by half a
+        # row, each output group's two parts sit side by side
+        rows = blocksize // width
+        self.parts = np.zeros(group + 2 * group * rows, dtype=np.float32)
+        # Sums the two halves of a row
+        self.fold = np.vstack([np.eye(group, dtype=np.float32)] * 2)
+        self.out = np.zeros((blocksize // factor, 1), dtype=np.float32)
+        self._views = {}
+
+    def _slices(self, frames):
+        # Every slice is a new view object, so the ones a block size needs
+        # are built on its first call and reused
+        views = self._views.get(frames)
+        if views is None:
+            if frames % (self.group * self.factor):
+                raise ValueError(
+                    f"{frames} frames is not a multiple of {self.group * self.factor}"
+                )
+            rows = frames // (self.group * self.factor)
+            size = 2 * self.group * rows
+            parts = self.parts[: self.group + size]
+            views = self._views[frames] = (
+                (rows, self.group * self.factor),
+                parts[self.group :].reshape(rows, -1),
+                parts[:size].reshape(rows, -1),
+                self.out[: frames // self.factor].reshape(rows, self.group),
+                self.out[: frames // self.factor],
+                parts[: self.group],
+                parts[size:],
+            )
+        return views
+
+    def process(self, block):
+        # block: (frames, 1); returns a view of the preallocated output,
+        # valid until the next call
+        shape, products, pairs, groups, out, head, tail = self._slices(len(block))
+        np.dot(block.reshape(shape), self.matrix, out=products)
+        np.dot(pairs, self.fold, out=groups)
+        np.copyto(head, tail)
+        return out
+
+
+class Interpolator:
+    # Integer-factor upsampler at the output device boundary, written
+    # straight into the device buffer with no zero-stuffing. Its FIR is
+    # `factor` phases of taps_per_phase taps, one per output position
+    # between two input frames. The caller renders each low-rate block
+    # into input(frames) and then calls process().
+
+    def __init__(self, factor, blocksize, taps_per_phase=16, cutoff=0.95):
+        # blocksize: low-rate frames per block
+        self.factor = factor
+        self.group = group = group_size(blocksize, taps_per_phase - 1)
+        width = group * factor  # device frames per group
+        h = lowpass(factor * taps_per_phase, cutoff * 0.5 / factor, gain=factor)
+        # phases[j, p] weights input n - (taps_per_phase - 1 - j) for output nL + p
+        phases = h.reshape(taps_per_phase, factor)[::-1]
+        # own[q, r * factor + p]: weight of input q of a group for output
+        # rL + p of that group, carried[...] for output rL + p of the next
+        self.own = np.zeros((group, width), dtype=np.float32)
+        self.carried = np.zeros((group, width), dtype=np.float32)
+        for q in range(group):
+            for r in range(group):
+                for matrix, j in ((self.own, q - r), (self.carried, q - r - group)):
+                    j += taps_per_phase - 1
+                    if 0 <= j < taps_per_phase:
+                        matrix[q, r * factor : (r + 1) * factor] = phases[j]
+        self.buffer = np.zeros((blocksize, 1), dtype=np.float32)
+        # The own parts, then the previous block's last carried part and
+        # this block's carried parts, so the two line up group by group
+        rows = blocksize // group
+        self.parts = np.zeros((2 * rows + 1) * width, dtype=np.float32)
+        self._views = {}
+
+    def _slices(self, frames):
+        # As Decimator._slices
+        views = self._views.get(frames)
+        if views is None:
+            if frames % self.group:
+                raise ValueError(f"{frames} frames is not a multiple of {self.group}")
+            rows = frames // self.group
+            size = rows * self.group * self.factor
+            width = self.group * self.factor
+            views = self._views[frames] = (
+                self.buffer[:frames],
+                self.buffer[:frames].reshape(rows, self.group),
+                self.parts[:size].reshape(rows, width),
+                self.parts[size + width : 2 * size + width].reshape(rows, width),
+                self.parts[:size].reshape(-1, 1),
+                self.parts[size : 2 * size].reshape(-1, 1),
+                self.parts[size : size + width],
+                self.parts[2 * size : 2 * size + width],
+            )
+        return views
+
+    def input(self, frames):
+        # The low-rate block to fill before process(frames)
+        return self._slices(frames)[0]
+
+    def process(self, out):
+        # out: (frames * factor, 1), the device buffer
+        views = self._slices(len(out) // self.factor)
+        _, rows, own, carried, own_column, carried_column, head, tail = views
+        np.dot(rows, self.own, out=own)
+        np.dot(rows, self.carried, out=carried)
+        np.add(own_column, carried_column, out=out)
+        np.copyto(head, tail)
+        return out
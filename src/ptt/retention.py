@@ -0,0 +1,207 @@
+# retention.py
+import heapq
+import os
+import shutil
+import threading
+import time
+
+from ptt.catalog import AUDIO_EXTENSIONS, RECORDER_PREFIX
+
+
+class RetentionManager:
+    # Deletes the oldest recordings once the directories exceed `max_bytes`,
+    # hold files older than `max_age` seconds, or the filesystem has less
+    # than `min_free_bytes` left. Files sit in a heap ordered by mtime, so
+    # each eviction is O(log n); new files arrive through add() (the
+    # recorder's on_saved) or from rescanning just the directories whose
+    # mtime changed, and files modified in the last `grace` seconds are
+    # re-stat'ed each pass and skipped, since something is still writing
+    # them. The catalog's database and WAL count towards max_bytes when they
+    # live in a managed directory, but are never deleted, and neither is
+    # any file whose name lacks `prefix` (the sox scripts' recorded_*.wav,
+    # replay corpora, anything copied in by hand). Everything runs
+    # on a low-priority thread; warnings go to `on_warning` (print by
+    # default, the bridge's console otherwise).
+
+    def __init__(
+        self,
+        directories,
+        max_bytes=None,
+        max_age=None,
+        min_free_bytes=None,
+        interval=30.0,
+        grace=60.0,
+        catalog=None,
+        on_deleted=None,
+        on_warning=None,
+        prefix=RECORDER_PREFIX,
+    ):
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.min_free_bytes = min_free_bytes
+        self.interval = interval
+        self.grace = grace
+        self.catalog = catalog  # rows of deleted files are dropped
+        self.on_deleted = on_deleted
+        self.on_warning = on_warning or print
+        self.prefix = prefix
+
+        self.files = {}  # path -> (mtime, size)
+        self.total_bytes = 0
+        self.catalog_bytes = 0  # catalog.db and its -wal/-shm, if managed
+        self.reclaimed_bytes = 0
+        self.deleted_files = 0
+        self._heap = []  # (mtime, path); stale when files[path] moved on
+        self._hot = set()  # paths modified within `grace`
+        self._dir_mtimes = {}
+        self._added = []  # paths queued by add(), list.append is atomic
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === Called from other threads ===
+    def add(self, path):
+        if os.path.basename(path).startswith(self.prefix):
+            self._added.append(os.path.abspath(path))
+
+    # === Retention thread ===
+    def _track(self, path, now):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._forget(path)
+            return
+        if now - stat.st_mtime < self.grace:
+            self._hot.add(path)
+        old = self.files.get(path)
+        if old == (stat.st_mtime, stat.st_size):
+            return
+        if old is not None:
+            self.total_bytes -= old[1]
+        self.files[path] = (stat.st_mtime, stat.st_size)
+        self.total_bytes += stat.st_size
+        heapq.heappush(self._heap, (stat.st_mtime, path))
+
+    def _forget(self, path):
+        entry = self.files.pop(path, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+        self._hot.discard(path)
+
+    def _scan(self, now):
+        for directory in self.directories:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except FileNotFoundError:
+                continue
+            if self._dir_mtimes.get(directory) == mtime:
+                continue
+            self._dir_mtimes[directory] = mtime
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if (
+                        entry.name.startswith(self.prefix)
+                        and entry.name.lower().endswith(AUDIO_EXTENSIONS)
+                        and entry.path not in self.files
+                    ):
+                        self._track(entry.path, now)
+
+        while self._added:
+            self._track(self._added.pop(), now)
+        for path in list(self._hot):
+            self._hot.discard(path)
+            self._track(path, now)
+        self.catalog_bytes = self._catalog_size()
+
+    def _catalog_size(self):
+        if self.catalog is None:
+            return 0
+        path = os.path.abspath(self.catalog.path)
+        if os.path.dirname(path) not in self.directories:
+            return 0
+        size = 0
+        for name in (path, path + "-wal", path + "-shm"):
+            try:
+                size += os.stat(name).st_size
+            except FileNotFoundError:
+                pass
+        return size
+
+    def _free_bytes(self):
+        return min(
+            (shutil.disk_usage(d).free for d in self.directories if os.path.isdir(d)),
+            default=float("inf"),
+        )
+
+    def _over_limit(self, now, mtime):
+        used = self.total_bytes + self.catalog_bytes
+        if self.max_bytes is not None and used > self.max_bytes:
+            return True
+        if self.max_age is not None and now - mtime > self.max_age:
+            return True
+        return (
+            self.min_free_bytes is not None and self._free_bytes() < self.min_free_bytes
+        )
+
+    def _evict(self, now):
+        writing = []  # hot files popped on the way, pushed back at the end
+        while self._heap:
+            mtime, path = self._heap[0]
+            if self.files.get(path, (None,))[0] != mtime:
+                heapq.heappop(self._heap)  # superseded or forgotten
+                continue
+            if not self._over_limit(now, mtime):
+                break
+            heapq.heappop(self._heap)
+            if path in self._hot:
+                # Still being written, the next oldest goes instead
+                writing.append((mtime, path))
+                continue
+            size = self.files[path][1]
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                size = 0
+            except OSError as e:
+                self.on_warning(f"⚠️ Retention could not delete {path}: {e}")
+                self._forget(path)
+                continue
+            self._forget(path)
+            self.reclaimed_bytes += size
+            self.deleted_files += 1
+            if self.catalog is not None:
+                self.catalog.remove(path)
+            if self.on_deleted is not None:
+                self.on_deleted(path, size)
+        for entry in writing:
+            heapq.heappush(self._heap, entry)
+
+    def run_once(self):
+        now = time.time()
+        self._scan(now)
+        self._evict(now)
+
+    def _run(self):
+        try:
+            # Linux applies niceness per thread, keep deletes behind audio
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        self.run_once()
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="retention", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
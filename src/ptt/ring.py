@@ -0,0 +1,121 @@
+# ring.py
+import numpy as np
+
+
+class RingBuffer:
+    # Single-producer/single-consumer audio ring over one preallocated array.
+    # Only the producer moves write_index and only the consumer moves
+    # read_index; both are plain ints that grow monotonically, so each side
+    # publishes its position with a single atomic store and no lock is taken
+    # on either PortAudio thread.
+
+    def __init__(self, frames, channels=1, dtype=np.float32, prefill=0):
+        self.capacity = frames
+        self.buffer = np.zeros((frames, channels), dtype=dtype)
+        self.prefill = min(prefill, frames)
+        self.write_index = 0
+        self.read_index = 0
+        self.primed = self.prefill == 0
+        # Frames dropped because the ring was full / zero-filled because it was empty
+        self.overruns = 0
+        self.underruns = 0
+
+    def fill(self):
+        return self.write_index - self.read_index
+
+    def space(self):
+        return self.capacity - self.fill()
+
+    def write(self, data):
+        # Producer side. When full, the newest frames are dropped and counted.
+        n = min(len(data), self.space())
+        if n < len(data):
+            self.overruns += len(data) - n
+        start = self.write_index % self.capacity
+        first = min(n, self.capacity - start)
+        # Slices are views, only take the ones a wrap or a short copy needs
+        self.buffer[start : start + first] = (
+            data if first == len(data) else data[:first]
+        )
+        if n > first:
+            self.buffer[: n - first] = data[first:n]
+        self.write_index += n
+        return n
+
+    def read(self, out):
+        # Consumer side, any number of frames. Missing frames are zero-filled
+        # and counted; after an underrun the ring waits for `prefill` frames
+        # before playing again so a starved stream does not stutter.
+        frames = len(out)
+        available = self.fill()
+        if not self.primed:
+            if available < self.prefill:
+                out.fill(0)
+                return 0
+            self.primed = True
+        n = min(frames, available)
+        start = self.read_index % self.capacity
+        first = min(n, self.capacity - start)
+        if first == frames:
+            out[...] = self.buffer[start : start + first]
+        else:
+            out[:first] = self.buffer[start : start + first]
+            out[first:n] = self.buffer[: n - first]
+        self.read_index += n
+        if n < frames:
+            out[n:] = 0
+            self.underruns += frames - n
+            self.primed = self.prefill == 0
+        return n
+
+
+class SharedRing(RingBuffer):
+    # RingBuffer whose samples and indices live in one shared memory block,
+    # so producer and consumer can run in different processes. It pickles
+    # as the block's name and unpickles by attaching, so passing it to a
+    # worker process hands over the same ring. Each index keeps its single
+    # writer; `primed` is consumer-local state.
+    HEADER = 64  # write_index, read_index, overruns, underruns as int64
+
+    def __init__(self, frames, channels=1, prefill=0, name=None):
+        from multiprocessing import shared_memory
+
+        size = self.HEADER + frames * channels * np.dtype(np.float32).itemsize
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.capacity = frames
+        self.channels = channels
+        self._counters = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+        self.buffer = np.ndarray(
+            (frames, channels),
+            dtype=np.float32,
+            buffer=self.shm.buf,
+            offset=self.HEADER,
+        )
+        self.prefill = min(prefill, frames)
+        self.primed = self.prefill == 0
+
+    def __reduce__(self):
+        return SharedRing, (self.capacity, self.channels, self.prefill, self.name)
+
+    def _counter(i):
+        return property(
+            lambda self: int(self._counters[i]),
+            lambda self, value: self._counters.__setitem__(i, value),
+        )
+
+    write_index = _counter(0)
+    read_index = _counter(1)
+    overruns = _counter(2)
+    underruns = _counter(3)
+    del _counter
+
+    def close(self, unlink=False):
+        # The array views pin the mapping, drop them first
+        del self._counters, self.buffer
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
@@ -0,0 +1,222 @@
+# rtprofile.py
+import ctypes
+import ctypes.util
+import gc
+import os
+import threading
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+
+def _libc():
+    return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def _status(field):
+    # A kB field of /proc/self/status, None off Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _memlock_unlimited():
+    # From /proc: src/resource shadows the stdlib module when run from src
+    try:
+        with open("/proc/self/limits") as f:
+            for line in f:
+                if line.startswith("Max locked memory"):
+                    return line.split()[3] == "unlimited"
+    except OSError:
+        pass
+    return False
+
+
+def _policy_name(policy):
+    names = {
+        getattr(os, name): name
+        for name in (
+            "SCHED_OTHER",
+            "SCHED_FIFO",
+            "SCHED_RR",
+            "SCHED_BATCH",
+            "SCHED_IDLE",
+        )
+        if hasattr(os, name)
+    }
+    return names.get(policy, str(policy))
+
+
+class RuntimeProfile:
+    # Opt-in real-time setup for the bridge. apply() runs once in the main
+    # thread before the streams open: it pins the process (and so every
+    # thread created later) to `process_cores`, locks memory and freezes
+    # the objects built during setup out of the GC's reach. enter_thread()
+    # runs on the first call of each audio callback, inside the PortAudio
+    # thread, and moves that thread to `cores` under SCHED_FIFO `priority`.
+    # Every step reads back what the kernel actually granted, and report()
+    # prints it; nothing here is fatal, a refused request is reported and
+    # the bridge runs as before.
+    #
+    # gc="freeze" leaves automatic collection on for new objects only;
+    # gc="off" disables it and collects on a low-priority thread every
+    # `gc_interval` seconds while `idle()` (no radio keyed) is true, or
+    # regardless after 10 intervals.
+
+    def __init__(
+        self,
+        cores=None,
+        process_cores=None,
+        priority=70,
+        lock_memory=True,
+        gc="freeze",
+        gc_interval=30.0,
+        report_after=2.0,
+    ):
+        if gc not in (None, "freeze", "off"):
+            raise ValueError(f"Unknown gc mode '{gc}', expected 'freeze' or 'off'")
+        self.cores = set(cores) if cores else None
+        self.process_cores = set(process_cores) if process_cores else None
+        self.priority = priority
+        self.lock_memory = lock_memory
+        self.gc = gc
+        self.gc_interval = gc_interval
+        self.report_after = report_after
+
+        self.process = {}  # what apply() obtained
+        self.threads = {}  # name -> what enter_thread() obtained
+        self.gc_runs = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    # === Main thread, before the streams start ===
+    def apply(self, idle=None):
+        if self.process_cores:
+            try:
+                os.sched_setaffinity(0, self.process_cores)
+            except (AttributeError, OSError) as e:
+                self.process["affinity_error"] = str(e)
+        if hasattr(os, "sched_getaffinity"):
+            self.process["cores"] = sorted(os.sched_getaffinity(0))
+
+        if self.lock_memory:
+            self.process["mlockall"] = self._lock_memory()
+            self.process["locked_kb"] = _status("VmLck")
+            self.process["resident_kb"] = _status("VmRSS")
+
+        if self.gc is not None:
+            gc.collect()
+            gc.freeze()
+            self.process["gc_frozen"] = gc.get_freeze_count()
+            if self.gc == "off":
+                gc.disable()
+                self._spawn(lambda: self._collect(idle), "gc")
+        self.process["gc"] = self.gc or "default"
+
+        if self.report_after:
+            # Give every callback time to run once
+            self._spawn(self._report_later, "rt-report")
+        return self
+
+    def _lock_memory(self):
+        # MCL_FUTURE under a finite RLIMIT_MEMLOCK would make later
+        # allocations fail once the limit is reached, so only lock what is
+        # mapped now unless the limit is unlimited
+        flags = MCL_CURRENT
+        if _memlock_unlimited() or os.geteuid() == 0:
+            flags |= MCL_FUTURE
+        try:
+            libc = _libc()
+        except OSError as e:
+            return f"failed: {e}"
+        if libc.mlockall(flags) != 0:
+            errno = ctypes.get_errno()
+            return f"failed: {os.strerror(errno)}"
+        return "current+future" if flags & MCL_FUTURE else "current"
+
+    # === Audio threads, first callback only ===
+    def enter_thread(self, name):
+        got = {}
+        if self.cores:
+            try:
+                os.sched_setaffinity(0, self.cores)
+            except OSError as e:
+                got["affinity_error"] = str(e)
+        if self.priority:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            except (AttributeError, OSError) as e:
+                got["sched_error"] = str(e)
+        try:
+            got["policy"] = _policy_name(os.sched_getscheduler(0))
+            got["priority"] = os.sched_getparam(0).sched_priority
+            got["cores"] = sorted(os.sched_getaffinity(0))
+        except (AttributeError, OSError):
+            pass
+        self.threads[name] = got
+
+    # === Housekeeping threads ===
+    def _spawn(self, target, name):
+        def run():
+            try:
+                # Linux applies niceness per thread, keep these behind audio
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+            except (AttributeError, OSError):
+                pass
+            target()
+
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _collect(self, idle):
+        waited = 0
+        while not self._stop.wait(self.gc_interval):
+            waited += 1
+            if idle is None or idle() or waited >= 10:
+                gc.collect()
+                self.gc_runs += 1
+                waited = 0
+
+    def _report_later(self):
+        if not self._stop.wait(self.report_after):
+            self.report()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.gc == "off":
+            gc.enable()
+
+    def lines(self):
+        # The report as console lines, for a MultiBridge worker to send on
+        p = self.process
+        line = f"⚙️ Runtime profile: cores {p.get('cores')}, gc {p['gc']}"
+        if "gc_frozen" in p:
+            line += f" ({p['gc_frozen']} objects frozen, {self.gc_runs} idle runs)"
+        if "affinity_error" in p:
+            line += f", {p['affinity_error']}"
+        lines = [line]
+        if self.lock_memory:
+            lines.append(
+                f"⚙️ mlockall {p['mlockall']}, {p['locked_kb']} kB locked, "
+                f"{p['resident_kb']} kB resident"
+            )
+        for name, got in self.threads.items():
+            ok = got.get("policy") == "SCHED_FIFO" or not self.priority
+            lines.append(
+                f"⚙️ [{name}] {'✅' if ok else '⚠️'} {got.get('policy')} "
+                f"priority {got.get('priority')}, cores {got.get('cores')}"
+                + "".join(f", {e}" for k, e in got.items() if k.endswith("_error"))
+            )
+        return lines
+
+    def report(self):
+        print("\n" + "\n".join(self.lines()))
@@ -0,0 +1,269 @@
+# scheduler.py
+import collections
+import heapq
+import math
+import threading
+import time
+
+# Lower runs first. Live bridge traffic outranks queued playback.
+PRIORITY_EMERGENCY = 0
+PRIORITY_LIVE = 10
+PRIORITY_NORMAL = 20
+PRIORITY_BEACON = 30
+
+MIN_GRANT = 1.0  # seconds of duty budget needed to key at all
+POLL = 0.05  # seconds between eligibility checks of a queued transmission
+WATCHDOG_INTERVAL = 0.1
+
+
+class Channel:
+    # One transmitter: its PTT line, limits and key-down history
+    def __init__(self, key, ptt, timeout, duty_cycle, window, gap):
+        self.key = key
+        self.ptt = ptt
+        self.timeout = timeout  # longest single key-down, seconds
+        self.window = window  # duty cycle window, seconds
+        self.budget = duty_cycle * window if duty_cycle < 1 else math.inf
+        self.gap = gap  # minimum unkeyed time between transmissions
+
+        self.holder = None  # who has the channel keyed
+        self.locked = None  # holder cut off by a limit, until it releases
+        self.keyed_at = 0.0
+        self.deadline = math.inf
+        self.released_at = -math.inf
+        self.intervals = collections.deque()  # closed (on, off) in the window
+        self.queue = []  # heap of (priority, seq) waiting in transmit()
+        self.denying = False
+
+        self.key_count = 0
+        self.keyed_seconds = 0.0
+        self.timeouts = 0
+        self.duty_cuts = 0
+        self.denied = collections.Counter()
+        self.abandoned = 0
+        self.max_wait = 0.0
+
+
+class TxScheduler:
+    # Every PTT line goes through here. A transmission either asks for the
+    # channel on the spot (acquire/check/release, what the bridge's audio
+    # callbacks do once per block) or queues a blocking transmit() that
+    # runs when it is first in line. Per radio it enforces:
+    #   timeout     time-out timer, no key-down lasts longer
+    #   duty_cycle  share of the sliding `window` spent keyed
+    #   gap         unkeyed seconds before the next key-up
+    # A holder cut off by the timeout or the duty budget stays off until it
+    # releases, like a repeater's TOT waiting for the carrier to drop.
+    # check() is one float compare until the current grant runs out; the
+    # watchdog thread drops PTT for holders that stop calling it.
+
+    def __init__(self, clock=None, sleep=None):
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self.channels = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, key, ptt, timeout=180.0, duty_cycle=1.0, window=600.0, gap=0.0):
+        ptt.off()
+        self.channels[key] = Channel(key, ptt, timeout, duty_cycle, window, gap)
+        return self.channels[key]
+
+    # === Accounting, called with the lock held ===
+    def _used(self, ch, now):
+        # Key-down seconds inside [now - window, now], current key-up included
+        start = now - ch.window
+        while ch.intervals and ch.intervals[0][1] <= start:
+            ch.intervals.popleft()
+        used = sum(min(off, now) - max(on, start) for on, off in ch.intervals)
+        if ch.holder is not None:
+            used += now - max(ch.keyed_at, start)
+        return used
+
+    def _blocked(self, ch, now, priority, holder):
+        # Why `holder` may not key now, or None
+        if ch.holder is not None:
+            return "busy"
+        if ch.locked == holder:
+            return "limit"
+        if now - ch.released_at < ch.gap:
+            return "gap"
+        if ch.budget - self._used(ch, now) < MIN_GRANT:
+            return "duty"
+        if ch.queue and ch.queue[0][0] < priority:
+            return "queued"
+        return None
+
+    def _key(self, ch, now, holder):
+        ch.deadline = now + min(ch.timeout, ch.budget - self._used(ch, now))
+        ch.holder = holder
+        ch.keyed_at = now
+        ch.key_count += 1
+        ch.denying = False
+        ch.ptt.on()
+        return ch.deadline - now
+
+    def _unkey(self, ch, now):
+        ch.ptt.off()
+        ch.intervals.append((ch.keyed_at, now))
+        ch.keyed_seconds += now - ch.keyed_at
+        ch.released_at = now
+        ch.holder = None
+        ch.deadline = math.inf
+
+    def _expire(self, ch, now):
+        # The grant ran out: extend it if the window slid, else cut PTT
+        if now - ch.keyed_at >= ch.timeout:
+            ch.timeouts += 1
+        elif self._used(ch, now) >= ch.budget:
+            ch.duty_cuts += 1
+        else:
+            ch.deadline = now + min(
+                ch.keyed_at + ch.timeout - now, ch.budget - self._used(ch, now)
+            )
+            return True
+        ch.locked = ch.holder
+        self._unkey(ch, now)
+        return False
+
+    # === On-the-spot keying (audio callbacks) ===
+    def acquire(self, key, now=None, holder="live", priority=PRIORITY_LIVE):
+        ch = self.channels[key]
+        now = self.clock() if now is None else now
+        with self._lock:
+            if ch.holder == holder:
+                return True
+            reason = self._blocked(ch, now, priority, holder)
+            if reason is None:
+                self._key(ch, now, holder)
+                return True
+            if not ch.denying:
+                # Count refusals once per attempt, not once per block
+                ch.denying = True
+                ch.denied[reason] += 1
+            return False
+
+    def check(self, key, now=None, holder="live"):
+        # True while `holder` may stay keyed
+        ch = self.channels[key]
+        if ch.holder != holder:
+            return False
+        now = self.clock() if now is None else now
+        if now < ch.deadline:
+            return True
+        with self._lock:
+            if ch.holder != holder:
+                return False
+            return self._expire(ch, now)
+
+    def release(self, key, now=None, holder="live"):
+        ch = self.channels[key]
+        now = self.clock() if now is None else now
+        with self._lock:
+            if ch.holder == holder:
+                self._unkey(ch, now)
+            if ch.locked == holder:
+                ch.locked = None
+            ch.denying = False
+
+    # === Queued transmissions ===
+    def transmit(self, key, play, priority=PRIORITY_NORMAL, wait=None):
+        # Blocks until this transmission is first in line and the limits
+        # allow it, then calls play(seconds) with PTT on and unkeys after.
+        # `seconds` is the key-down time granted; play should stop within
+        # it, the watchdog cuts PTT if it does not. Returns False if the
+        # channel did not come free within `wait` seconds.
+        ch = self.channels[key]
+        queued_at = self.clock()
+        with self._lock:
+            self._seq += 1
+            entry = (priority, self._seq)
+            heapq.heappush(ch.queue, entry)
+        while True:
+            now = self.clock()
+            with self._lock:
+                if (
+                    ch.queue[0] == entry
+                    and self._blocked(ch, now, priority, entry) is None
+                ):
+                    heapq.heappop(ch.queue)
+                    granted = self._key(ch, now, entry)
+                    ch.max_wait = max(ch.max_wait, now - queued_at)
+                    break
+                if wait is not None and now - queued_at >= wait:
+                    ch.queue.remove(entry)
+                    heapq.heapify(ch.queue)
+                    ch.abandoned += 1
+                    return False
+            self.sleep(POLL)
+        try:
+            play(granted)
+        finally:
+            self.release(key, holder=entry)
+        return True
+
+    # === Watchdog thread ===
+    def _watch(self):
+        while not self._stop.wait(WATCHDOG_INTERVAL):
+            for ch in list(self.channels.values()):
+                now = self.clock()
+                if ch.holder is not None and now >= ch.deadline:
+                    with self._lock:
+                        if ch.holder is not None and now >= ch.deadline:
+                            self._expire(ch, now)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._watch, name="tx-watchdog", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        now = self.clock()
+        with self._lock:
+            for ch in self.channels.values():
+                if ch.holder is not None:
+                    self._unkey(ch, now)
+                ch.ptt.off()
+
+    # === Statistics ===
+    def keyed(self, key):
+        return self.channels[key].holder is not None
+
+    def stats(self, now=None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            return {
+                key: {
+                    "keyed": ch.holder is not None,
+                    "key_count": ch.key_count,
+                    "keyed_seconds": ch.keyed_seconds
+                    + (now - ch.keyed_at if ch.holder is not None else 0.0),
+                    "duty": self._used(ch, now) / ch.window,
+                    "timeouts": ch.timeouts,
+                    "duty_cuts": ch.duty_cuts,
+                    "denied": dict(ch.denied),
+                    "queued": len(ch.queue),
+                    "abandoned": ch.abandoned,
+                    "max_wait": ch.max_wait,
+                }
+                for key, ch in self.channels.items()
+            }
+
+    def report(self):
+        for key, s in self.stats().items():
+            denied = ", ".join(f"{r} {n}" for r, n in s["denied"].items()) or "none"
+            print(
+                f"[{key}] TX {s['key_count']}× {s['keyed_seconds']:.0f}s, "
+                f"duty {s['duty']:.0%}, time-outs {s['timeouts']}, "
+                f"duty cuts {s['duty_cuts']}, denied: {denied}"
+            )
@@ -0,0 +1,265 @@
+# stream.py
+import math
+import queue
+
+import numpy as np
+
+from ptt import backend as backends
+from ptt import dsp, vad
+from ptt.noisefloor import NoiseFloor
+from ptt.scheduler import PRIORITY_NORMAL, TxScheduler
+
+CAPTURE_SECONDS = 180.0  # capture ring when there is no TX timeout to size it
+
+
+class VoxEngine:
+    # Persistent capture/playback engine: both ALSA devices stay open for the
+    # lifetime of the engine and detected overs are handed to the transmitter
+    # as in-memory PCM, so nothing is spawned or written to disk per cycle.
+
+    def __init__(
+        self,
+        device_in="plughw:2,0",
+        device_out="plughw:2,0",
+        ptt_pin=17,
+        sample_rate=44100,
+        blocksize=1024,
+        threshold=0.01,
+        min_voice=0.1,
+        max_silence=2.0,
+        keyup_delay=0.3,
+        vad_kind="rms",
+        backend=None,
+        queue_size=0,
+        scheduler=None,
+        tx_limits=None,
+        noise_floor=None,
+        capture_seconds=None,
+    ):
+        self.backend = backend or backends.default()
+        self.device_in = device_in
+        self.device_out = device_out
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.threshold = threshold
+        self.min_voice = min_voice
+        self.max_silence = max_silence
+        self.keyup_delay = keyup_delay
+        self.vad = vad.create(vad_kind, sample_rate, blocksize, threshold)
+        # noise_floor: NoiseFloor options; the threshold then follows the
+        # receiver's noise once the tracker has warmed up
+        self.noise_floor = (
+            NoiseFloor(blocksize / sample_rate, **noise_floor)
+            if noise_floor is not None
+            else None
+        )
+
+        # Keying goes through the TX scheduler; tx_limits are its register()
+        # options (timeout, duty_cycle, window, gap) for this PTT line
+        self.ptt_pin = ptt_pin
+        self.ptt = self.backend.ptt(ptt_pin)
+        self._own_scheduler = scheduler is None
+        self.scheduler = scheduler or TxScheduler(
+            self.backend.clock, self.backend.sleep
+        )
+        self.scheduler.register(ptt_pin, self.ptt, **(tx_limits or {}))
+
+        # Bounded when queue_size > 0: the oldest waiting over is dropped
+        # rather than blocking the input callback
+        self.overs = queue.Queue(maxsize=queue_size)
+        self.captured = 0
+        self.dropped = 0
+        self.cut = 0  # overs closed early because the capture ring was full
+
+        # Overs are captured into one preallocated ring holding a TX timeout
+        # of audio (capture_seconds sizes it otherwise, CAPTURE_SECONDS when
+        # there is no timeout). The input callback copies each block in and
+        # hands an over off as its (start, end) frame positions; capture()
+        # copies it out on the consumer's thread and releases the space. An
+        # over that would overwrite audio capture() has not taken yet is
+        # closed there, so memory stays fixed however long the input talks.
+        seconds = capture_seconds or self.scheduler.channels[ptt_pin].timeout
+        if not math.isfinite(seconds):
+            seconds = CAPTURE_SECONDS
+        self.capacity = math.ceil(seconds * sample_rate / blocksize) * blocksize
+        self._ring = np.zeros((self.capacity, 1), dtype=np.float32)
+        # Monotonic frame positions; only the callback moves the first
+        # three and only capture() moves _released
+        self._start = 0  # the current over's first frame
+        self._end = 0  # next frame written
+        self._last_voiced = 0  # end of the current over's last voiced block
+        self._released = 0  # everything before it has been copied out
+        self._voiced_frames = 0
+        self._silent_frames = 0
+        self._in_over = False
+
+        self.input_stream = None
+        self.output_stream = None
+
+    # === DETECTOR (PortAudio input thread) ===
+    def _input_callback(self, indata, frames, time_info, status):
+        rms = dsp.rms(indata)
+        tracker = self.noise_floor
+        if (
+            tracker is not None
+            and not self.scheduler.keyed(self.ptt_pin)
+            and tracker.update(rms)
+        ):
+            self.vad.threshold = tracker.threshold
+        voiced = self.vad.update(indata, rms)
+
+        if not self._in_over:
+            if voiced and self._write(indata):
+                # Keep the blocks that lead up to the trigger, like sox does
+                self._voiced_frames += frames
+                if self._voiced_frames >= self.min_voice * self.sample_rate:
+                    self._in_over = True
+                    self._last_voiced = self._end
+                    self._silent_frames = 0
+            else:
+                # Silence, or no room until capture() takes the waiting overs
+                self._end = self._start
+                self._voiced_frames = 0
+            return
+
+        if not self._write(indata):
+            self.cut += 1
+            self._close_over()
+            return
+        if voiced:
+            self._last_voiced = self._end
+            self._silent_frames = 0
+            return
+
+        self._silent_frames += frames
+        if self._silent_frames >= self.max_silence * self.sample_rate:
+            self._close_over()
+
+    def _write(self, block):
+        # Appends a block to the capture ring, False if it has no room
+        frames = len(block)
+        if self._end + frames - self._released > self.capacity:
+            return False
+        start = self._end % self.capacity
+        first = min(frames, self.capacity - start)
+        self._ring[start : start + first] = block if first == frames else block[:first]
+        if first < frames:
+            self._ring[: frames - first] = block[first:]
+        self._end += frames
+        return True
+
+    def _close_over(self):
+        # Trailing silence is trimmed, and written over by the next over
+        self._hand_off((self._start, self._last_voiced))
+        self._start = self._end = self._last_voiced
+        self._voiced_frames = 0
+        self._in_over = False
+
+    def _hand_off(self, over):
+        self.captured += 1
+        while True:
+            try:
+                self.overs.put_nowait(over)
+                return
+            except queue.Full:
+                try:
+                    self.overs.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def start(self):
+        self.output_stream = self.backend.output_stream(
+            self.device_out, self.sample_rate, self.blocksize
+        )
+        self.input_stream = self.backend.input_stream(
+            self.device_in, self.sample_rate, self.blocksize, self._input_callback
+        )
+        self.output_stream.start()
+        self.input_stream.start()
+        self.scheduler.start()
+        return self
+
+    def capture(self, timeout=None):
+        # Block until the detector has a complete over; None on timeout
+        try:
+            start, end = self.overs.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        pcm = np.empty((end - start, 1), dtype=np.float32)
+        offset = start % self.capacity
+        first = min(end - start, self.capacity - offset)
+        pcm[:first] = self._ring[offset : offset + first]
+        pcm[first:] = self._ring[: end - start - first]
+        # Overs dropped from the queue before this one are released with it
+        self._released = end
+        return pcm
+
+    def transmit(self, pcm, priority=PRIORITY_NORMAL):
+        # Waits for the scheduler; an over longer than the granted key-down
+        # is cut short. Returns False if it never got the channel.
+        pcm = np.ascontiguousarray(pcm, dtype=np.float32)
+
+        def play(seconds):
+            self.backend.sleep(self.keyup_delay)  # Wait for radio to go TX
+            room = seconds - self.keyup_delay - self.output_stream.latency
+            if room * self.sample_rate < len(pcm):
+                self.output_stream.write(pcm[: max(0, int(room * self.sample_rate))])
+            else:
+                self.output_stream.write(pcm)
+            # write() returns once the last block is queued, let the device drain
+            self.backend.sleep(self.output_stream.latency)
+
+        return self.scheduler.transmit(self.ptt_pin, play, priority)
+
+    def close(self):
+        if self._own_scheduler:
+            self.scheduler.stop()
+        self.ptt.off()
+        for stream in (self.input_stream, self.output_stream):
+            if stream is not None:
+                stream.stop()
+                stream.close()
+        self.input_stream = None
+        self.output_stream = None
+
+
+def start(
+    DEVICE_IN: str = "plughw:2,0",
+    DEVICE_OUT: str = "plughw:2,0",
+    PTT_PIN: int = 17,
+    SAMPLE_RATE: int = 44100,
+    THRESHOLD: float = 0.01,
+    MAX_SILENCE: float = 2.0,
+    KEYUP_DELAY: float = 0.3,
+    TX_TIMEOUT: float = 180.0,
+    VAD: str = "rms",
+    NOISE_FLOOR=None,
+    BACKEND=None,
+):
+    engine = VoxEngine(
+        device_in=DEVICE_IN,
+        device_out=DEVICE_OUT,
+        ptt_pin=PTT_PIN,
+        sample_rate=SAMPLE_RATE,
+        threshold=THRESHOLD,
+        max_silence=MAX_SILENCE,
+        keyup_delay=KEYUP_DELAY,
+        vad_kind=VAD,
+        backend=BACKEND,
+        tx_limits={"timeout": TX_TIMEOUT},
+        noise_floor=NOISE_FLOOR,
+    ).start()
+
+    print("🎙️ Listening... Speak to record.")
+    try:
+        while True:
+            pcm = engine.capture()
+            print(f"✅ Captured {len(pcm) / SAMPLE_RATE:.1f}s in memory.")
+            print("📡 Transmitting recording...")
+            engine.transmit(pcm)
+            print("✅ Done playing.")
+    except KeyboardInterrupt:
+        print("\n🛑 Exiting cleanly...")
+    finally:
+        engine.close()
@@ -0,0 +1,68 @@
+# telemetry.py
+import collections
+import os
+import threading
+
+import numpy as np
+
+
+class Telemetry:
+    # Audio callbacks only store numbers into preallocated slots (one per
+    # stream) and append prebuilt event strings; a low-priority reporter
+    # thread does all formatting and console I/O at `rate` lines per second.
+    # With rate=0 nothing is ever printed, for headless deployments.
+
+    def __init__(self, labels, states=("IDLE", "TX"), rate=5.0):
+        self.labels = list(labels)
+        self.states = states
+        self.rate = rate
+        self.levels = np.zeros(len(self.labels), dtype=np.float64)
+        self.peaks = np.zeros(len(self.labels), dtype=np.float64)
+        self.state = np.zeros(len(self.labels), dtype=np.int64)
+        self.events = collections.deque(maxlen=256)
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === Called from the audio threads ===
+    def publish(self, slot, level, state=0):
+        self.levels[slot] = level
+        self.peaks[slot] = max(self.peaks[slot], level)
+        self.state[slot] = state
+
+    def event(self, message):
+        # deque.append is atomic; pass strings built before the stream started
+        self.events.append(message)
+
+    # === Reporter thread ===
+    def render(self):
+        return " | ".join(
+            f"[{label}] {self.states[self.state[i]]} RMS: {self.levels[i]:.5f} Max: {self.peaks[i]:.5f}"
+            for i, label in enumerate(self.labels)
+        )
+
+    def _run(self):
+        try:
+            # Linux applies niceness per thread, keep the reporter behind audio
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        while not self._stop.wait(1.0 / self.rate):
+            while self.events:
+                print(f"\n{self.events.popleft()}", flush=True)
+            print(self.render(), end="\r", flush=True)
+
+    def start(self):
+        if self.rate > 0 and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="telemetry", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while self.rate > 0 and self.events:
+            print(f"\n{self.events.popleft()}", flush=True)
@@ -0,0 +1,218 @@
+# tones.py
+import math
+
+import numpy as np
+
+# EIA/TIA-603 CTCSS sub-tones, Hz
+CTCSS_TONES = (
+    67.0, 69.3, 71.9, 74.4, 77.0, 79.7, 82.5, 85.4, 88.5, 91.5,
+    94.8, 97.4, 100.0, 103.5, 107.2, 110.9, 114.8, 118.8, 123.0, 127.3,
+    131.8, 136.5, 141.3, 146.2, 151.4, 156.7, 159.8, 162.2, 165.5, 167.9,
+    171.3, 173.8, 177.3, 179.9, 183.5, 186.2, 189.9, 192.8, 196.6, 199.5,
+    203.5, 206.5, 210.7, 218.1, 225.7, 229.1, 233.6, 241.8, 250.3, 254.1,
+)  # fmt: skip
+DTMF_ROWS = (697.0, 770.0, 852.0, 941.0)
+DTMF_COLUMNS = (1209.0, 1336.0, 1477.0, 1633.0)
+DTMF_KEYS = ("123A", "456B", "789C", "*0#D")
+
+
+class ToneBank:
+    # Goertzel detectors for a set of frequencies, batched. A Goertzel
+    # filter run over N samples ends on the DFT term at its frequency, so
+    # instead of N recursive steps per tone in Python every block is
+    # projected onto precomputed cos/sin rows in one (2F x N) @ (N) product.
+    # Per-block terms are rotated to a common time origin and summed over
+    # the last `window` seconds in a ring, which gives the frequency
+    # resolution of that window (1 / window Hz) at the cost of one block.
+    # amplitudes holds the sine amplitude at each frequency over the window
+    # and level the window's RMS; nothing block-sized is allocated.
+
+    def __init__(self, frequencies, sample_rate, blocksize, window):
+        self.frequencies = tuple(frequencies)
+        f = len(self.frequencies)
+        omega = 2 * np.pi * np.asarray(self.frequencies) / sample_rate
+        phase = np.outer(omega, np.arange(blocksize))
+        self.basis = np.concatenate([np.cos(phase), np.sin(phase)]).astype(np.float32)
+        self.blocks = max(1, round(window * sample_rate / blocksize))
+        self.length = self.blocks * blocksize  # samples in the window
+
+        self._projection = np.zeros(2 * f, dtype=np.float32)
+        self._part = np.zeros(f, dtype=np.complex128)
+        self._parts = np.zeros((self.blocks, f), dtype=np.complex128)
+        self._energies = np.zeros(self.blocks)
+        self._sum = np.zeros(f, dtype=np.complex128)
+        self._energy = 0.0
+        self._phase = np.ones(f, dtype=np.complex128)  # e^{-jω n0}
+        self._step = np.exp(-1j * omega * blocksize)
+        self.count = 0
+
+        self.amplitudes = np.zeros(f)
+        self.level = 0.0
+
+    def update(self, x):
+        # x: one block of blocksize samples; True once the window is full
+        f = len(self.frequencies)
+        np.dot(self.basis, x, out=self._projection)
+        part = self._part
+        part.real = self._projection[:f]
+        part.imag = self._projection[f:]
+        np.conjugate(part, out=part)
+        part *= self._phase
+
+        slot = self.count % self.blocks
+        self._sum -= self._parts[slot]
+        self._sum += part
+        self._parts[slot] = part
+        energy = float(np.dot(x, x))
+        self._energy += energy - self._energies[slot]
+        self._energies[slot] = energy
+        self._phase *= self._step
+        self.count += 1
+        if self.count % 4096 == 0:
+            # Running sums and the phasor drift with rounding, resync them
+            np.sum(self._parts, axis=0, out=self._sum)
+            self._energy = float(self._energies.sum())
+            self._phase /= np.abs(self._phase)
+
+        np.abs(self._sum, out=self.amplitudes)
+        self.amplitudes *= 2 / self.length
+        self.level = math.sqrt(max(self._energy, 0.0) / self.length)
+        return self.count >= self.blocks
+
+
+class ToneDecoder:
+    # CTCSS and DTMF on one radio input, evaluated every block.
+    #
+    # CTCSS: all 50 standard tones over `ctcss_window` seconds (0.5 s
+    # resolves the 2-3 Hz spacing at the bottom of the table). The
+    # strongest is the received tone if it reaches `ctcss_level` and
+    # `ctcss_ratio` times the median of the others, since voice spreads
+    # over many of them. `ctcss` names the tone(s) accepted; anything
+    # without one is not passed. Radios that filter sub-tones out of
+    # their speaker audio need a discriminator tap for this to work.
+    #
+    # DTMF: the 8 row/column tones over ~one block. A digit needs one row
+    # and one column each `dtmf_ratio` above the rest of its group, within
+    # `dtmf_twist` dB of each other and carrying `dtmf_share` of the
+    # block's energy, in two consecutive blocks; it is entered once per
+    # key press. "*" clears the entry, "#" completes it and update()
+    # returns it, and `digit_timeout` seconds without a key clear it too.
+    # While a digit is sounding the input is not passed either, so control
+    # tones are not relayed.
+
+    def __init__(
+        self,
+        sample_rate,
+        blocksize,
+        ctcss=None,
+        dtmf=False,
+        ctcss_window=0.5,
+        ctcss_level=0.002,
+        ctcss_ratio=4.0,
+        dtmf_window=0.025,
+        dtmf_level=0.01,
+        dtmf_ratio=2.0,
+        dtmf_twist=8.0,
+        dtmf_share=0.6,
+        digit_timeout=3.0,
+    ):
+        self.ctcss = None
+        if ctcss is not None:
+            tones = ctcss if isinstance(ctcss, (list, tuple, set)) else (ctcss,)
+            self.accept = {min(CTCSS_TONES, key=lambda t: abs(t - f)) for f in tones}
+            self.ctcss = ToneBank(CTCSS_TONES, sample_rate, blocksize, ctcss_window)
+            self.ctcss_level = ctcss_level
+            self.ctcss_ratio = ctcss_ratio
+        self.dtmf = None
+        if dtmf:
+            self.dtmf = ToneBank(
+                DTMF_ROWS + DTMF_COLUMNS, sample_rate, blocksize, dtmf_window
+            )
+            self.dtmf_level = dtmf_level
+            self.dtmf_ratio = dtmf_ratio
+            self.dtmf_twist = 10 ** (dtmf_twist / 20)
+            self.dtmf_share = dtmf_share
+        self._timeout = math.ceil(digit_timeout * sample_rate / blocksize)
+
+        self.tone = None  # CTCSS tone heard over the last window
+        self.digit = None  # DTMF key held down
+        self.entry = ""  # digits since "*", "#" or the timeout
+        self.passing = self.ctcss is None
+        self.commands = 0
+        self._candidate = None
+        self._seen = 0
+        self._idle = 0
+
+    def update(self, block):
+        # The completed DTMF entry when "#" was just pressed, else None
+        x = block.reshape(-1)
+        entered = None
+        sounding = None
+        if self.ctcss is not None:
+            self.tone = self._ctcss(x)
+        if self.dtmf is not None:
+            sounding = self._dtmf(x)
+            entered = self._debounce(sounding)
+        self.passing = (
+            self.ctcss is None or self.tone in self.accept
+        ) and sounding is None
+        return entered
+
+    def _ctcss(self, x):
+        bank = self.ctcss
+        if not bank.update(x):
+            return None
+        amplitudes = bank.amplitudes
+        i = int(np.argmax(amplitudes))
+        best = amplitudes[i]
+        if best < self.ctcss_level:
+            return None
+        if best < self.ctcss_ratio * np.median(amplitudes):
+            return None
+        return CTCSS_TONES[i]
+
+    def _dtmf(self, x):
+        bank = self.dtmf
+        if not bank.update(x) or bank.level < self.dtmf_level:
+            return None
+        found = []
+        for group in (bank.amplitudes[:4], bank.amplitudes[4:]):
+            i = int(np.argmax(group))
+            best = group[i]
+            others = max(a for j, a in enumerate(group) if j != i)
+            if best < self.dtmf_level or best < self.dtmf_ratio * others:
+                return None
+            found.append((i, best))
+        (row, a), (column, b) = found
+        if not 1 / self.dtmf_twist <= a / b <= self.dtmf_twist:
+            return None
+        # Both tones together carry most of the signal, not speech
+        if (a * a + b * b) / 2 < self.dtmf_share * bank.level**2:
+            return None
+        return DTMF_KEYS[row][column]
+
+    def _debounce(self, sounding):
+        if sounding is None or sounding != self._candidate:
+            self._candidate = sounding
+            self._seen = 0
+        self._seen += 1
+        if sounding is None:
+            self.digit = None
+            self._idle += 1
+            if self._idle >= self._timeout:
+                self.entry = ""
+            return None
+        if self._seen < 2 or sounding == self.digit:
+            return None
+        # A new key press
+        self.digit = sounding
+        self._idle = 0
+        if sounding == "*":
+            self.entry = ""
+        elif sounding == "#":
+            entered, self.entry = self.entry, ""
+            self.commands += 1
+            return entered
+        else:
+            self.entry += sounding
+        return None
@@ -0,0 +1,110 @@
+# vad.py
+import math
+
+import numpy as np
+
+
+class EnergyVAD:
+    # The original VOX: a block is voice when its RMS is above threshold
+
+    def __init__(self, threshold=0.02):
+        self.threshold = threshold
+        self.voiced = False
+
+    def update(self, block, rms):
+        self.voiced = rms > self.threshold
+        return self.voiced
+
+
+class MultiFeatureVAD:
+    # Energy, zero-crossing rate and voice-band energy ratio per block, with
+    # separate attack/release hysteresis. Squelch tails, carrier hiss and
+    # static crashes are loud but broadband (high ZCR, little of their energy
+    # in 260-3400 Hz), and a lone CTCSS tone sits below the band, so none of
+    # them key the far radio. The features are only computed for blocks
+    # above the energy threshold and land in preallocated buffers, so the
+    # cost per block is bounded by one real FFT plus a few reductions.
+
+    def __init__(
+        self,
+        sample_rate,
+        blocksize,
+        threshold=0.02,
+        release_ratio=0.7,
+        max_zcr=6000.0,
+        band=(260.0, 3400.0),
+        min_band_ratio=0.5,
+        attack=0.05,
+        release=0.3,
+    ):
+        self.threshold = threshold
+        self.release_ratio = release_ratio  # release threshold relative to attack
+        self.max_crossings = max_zcr * blocksize / sample_rate
+        self.min_band_ratio = min_band_ratio
+        self.attack_blocks = max(1, math.ceil(attack * sample_rate / blocksize))
+        self.release_blocks = max(1, math.ceil(release * sample_rate / blocksize))
+
+        self.blocksize = blocksize
+        bin_hz = sample_rate / blocksize
+        self.band = slice(
+            max(1, int(band[0] / bin_hz)),
+            min(blocksize // 2 + 1, int(band[1] / bin_hz) + 1),
+        )
+        self._signs = np.zeros(blocksize, dtype=bool)
+        self._crossings = np.zeros(blocksize - 1, dtype=bool)
+        self._spectrum = np.zeros(blocksize // 2 + 1, dtype=np.complex128)
+        self._power = np.zeros(blocksize // 2 + 1, dtype=np.float64)
+
+        self.voiced = False
+        self._run = 0  # consecutive blocks disagreeing with the current state
+        # Last block's features, for telemetry and tuning
+        self.crossings = 0
+        self.band_ratio = 0.0
+
+    def features(self, block):
+        x = block.reshape(-1)
+        np.signbit(x, out=self._signs)
+        np.not_equal(self._signs[1:], self._signs[:-1], out=self._crossings)
+        self.crossings = np.count_nonzero(self._crossings)
+
+        np.fft.rfft(x, out=self._spectrum)
+        np.abs(self._spectrum, out=self._power)
+        np.multiply(self._power, self._power, out=self._power)
+        total = float(self._power[1:].sum())
+        in_band = float(self._power[self.band].sum())
+        self.band_ratio = in_band / total if total > 0 else 0.0
+
+    def update(self, block, rms):
+        if len(block) != self.blocksize:
+            return self.voiced
+        threshold = (
+            self.threshold * self.release_ratio if self.voiced else self.threshold
+        )
+        if rms > threshold:
+            self.features(block)
+            candidate = (
+                self.crossings <= self.max_crossings
+                and self.band_ratio >= self.min_band_ratio
+            )
+        else:
+            candidate = False
+
+        if candidate == self.voiced:
+            self._run = 0
+        else:
+            self._run += 1
+            if self._run >= (
+                self.release_blocks if self.voiced else self.attack_blocks
+            ):
+                self.voiced = candidate
+                self._run = 0
+        return self.voiced
+
+
+def create(kind, sample_rate, blocksize, threshold, **options):
+    # Factory for the per-radio "vad" setting
+    if kind == "rms":
+        return EnergyVAD(threshold)
+    if kind == "multi":
+        return MultiFeatureVAD(sample_rate, blocksize, threshold=threshold, **options)
+    raise ValueError(f"Unknown VAD '{kind}', expected 'rms' or 'multi'")